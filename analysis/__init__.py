@@ -0,0 +1,44 @@
+from .cache import ResultCache, code_version
+from .collection import COLLECTORS, CSVSink, CollectionJob, Collector, JSONLSink, sweep
+from .distributed import Coordinator, DistributedSweepError, run_worker, start_workers
+from .loadtest import LoadGenerator, MessagingPipeline, find_max_throughput
+from .streaming import Downsampler, MetricAggregate, QuantileSketch, RunningStats, StreamingAggregator
+from .security import (
+    brute_force_grid,
+    calibrate_ops_per_qubit,
+    format_log2_seconds,
+    key_length_bits,
+    log2_brute_force_seconds,
+    log2_computing_cost,
+    monte_carlo_break_probability,
+)
+
+__all__ = [
+    'COLLECTORS',
+    'CSVSink',
+    'CollectionJob',
+    'Collector',
+    'Coordinator',
+    'DistributedSweepError',
+    'JSONLSink',
+    'LoadGenerator',
+    'MessagingPipeline',
+    'Downsampler',
+    'MetricAggregate',
+    'QuantileSketch',
+    'ResultCache',
+    'RunningStats',
+    'StreamingAggregator',
+    'code_version',
+    'find_max_throughput',
+    'run_worker',
+    'start_workers',
+    'sweep',
+    'brute_force_grid',
+    'calibrate_ops_per_qubit',
+    'format_log2_seconds',
+    'key_length_bits',
+    'log2_brute_force_seconds',
+    'log2_computing_cost',
+    'monte_carlo_break_probability',
+]
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import struct
+from collections import OrderedDict
+from functools import lru_cache
+
+SOURCE_PACKAGES = ("qkd", "comms", "crypto", "analysis", "network", "utils")
+ENTRY_HEADER = struct.Struct(">I")  # Length of the JSON row; raw key bytes follow it
+ENTRY_SUFFIX = ".entry"
+
+
+@lru_cache(maxsize=None)
+def code_version(root=None, packages=SOURCE_PACKAGES):
+    """
+    Hash of every Python source file in the simulation packages, so that any code change
+    invalidates cached results without relying on git metadata.
+    """
+    root = root or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for package in packages:
+        for directory, subdirectories, files in sorted(os.walk(os.path.join(root, package))):
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    path = os.path.join(directory, name)
+                    digest.update(os.path.relpath(path, root).encode("utf-8"))
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_key(collectors, config, seed, version):
+    """
+    Content address of one run: a SHA-256 over the canonical JSON of everything that
+    determines its result.
+    """
+    payload = json.dumps({"collectors": list(collectors), "config": config, "seed": seed, "version": version},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=".qkd_cache", max_bytes=256 * 2 ** 20, store_keys=False, version=None):
+        """
+        On-disk cache of collection rows keyed by cache_key(). Each entry is one file, the
+        JSON row followed by the raw key bytes when store_keys is set, written atomically.
+        Hits refresh the file's modification time, and once the cache exceeds max_bytes the
+        least recently used entries are removed.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_keys = store_keys
+        self.version = version or code_version()
+        self.index = None
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def _load_index(self):
+        """
+        Scans the cache directory once, ordering entries from least to most recently used.
+        """
+        entries = []
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(ENTRY_SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-len(ENTRY_SUFFIX)], stat.st_size))
+        entries.sort()
+        self.index = OrderedDict((key, size) for _, key, size in entries)
+        self.total_bytes = sum(self.index.values())
+
+    def key_for(self, collectors, config, seed):
+        return cache_key(collectors, config, seed, self.version)
+
+    def get(self, key):
+        """
+        Returns (row, raw_key) for a cached run, raw_key being None if it was not stored,
+        or None on a miss.
+        """
+        if self.index is None:
+            self._load_index()
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.index.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+        (row_length,) = ENTRY_HEADER.unpack_from(data)
+        row = json.loads(data[ENTRY_HEADER.size:ENTRY_HEADER.size + row_length])
+        raw_key = data[ENTRY_HEADER.size + row_length:] or None
+        os.utime(path)
+        self.total_bytes += len(data) - self.index.pop(key, 0)
+        self.index[key] = len(data)
+        self.stats["hits"] += 1
+        return row, raw_key
+
+    def put(self, key, row, raw_key=None):
+        """
+        Stores a row and, if store_keys is set, the raw key bytes alongside it.
+        """
+        if self.index is None:
+            self._load_index()
+        encoded = json.dumps(row, separators=(",", ":")).encode("utf-8")
+        data = ENTRY_HEADER.pack(len(encoded)) + encoded
+        if self.store_keys and raw_key:
+            data += raw_key
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self.total_bytes += len(data) - self.index.pop(key, 0)
+        self.index[key] = len(data)
+        self.stats["writes"] += 1
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        """
+        while self.total_bytes > self.max_bytes and len(self.index) > 1:
+            key, size = self.index.popitem(last=False)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """
+        Removes every entry in the cache.
+        """
+        if self.index is None:
+            self._load_index()
+        for key in self.index:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self.index.clear()
+        self.total_bytes = 0
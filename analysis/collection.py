@@ -0,0 +1,379 @@
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+from qkd.qkd_protocol import QKDProtocol, SecurityException
+from qkd.key_quality import KeyQuality
+from crypto.encryption import Encryption
+from crypto.key_derivation import KeyDerivation
+from analysis.security import key_length_bits, log2_brute_force_seconds
+
+DEFAULT_CONFIG = {
+    "num_qubits": 2048,
+    "error_threshold": 0.11,
+    "message_size": 1024,
+    "noise_level": 0.02,  # Channel flip rate; well below error_threshold so default runs rarely abort
+}
+
+
+def measure_time(func, *args, **kwargs):
+    """
+    Measures the execution time of a function and returns (result, seconds).
+    """
+    start_time = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+class RunContext:
+    """
+    State shared by the collectors of a single run: the configuration, the QKD key
+    once it has been generated, and a cipher derived from it.
+    """
+    def __init__(self, config, seed):
+        self.config = config
+        self.seed = seed
+        self.qkd = None
+        self.qkd_aborted = None
+        self.raw_key = None
+        self.encryption = None
+
+    def key_bits(self):
+        """
+        Unpacks the hex QKD key into a uint8 array of bits.
+        """
+        return np.unpackbits(np.frombuffer(bytes.fromhex(self.raw_key), dtype=np.uint8))
+
+    def message(self):
+        return os.urandom(self.config["message_size"])
+
+
+class Collector:
+    """
+    Base class for a metric collector. Subclasses set a registry name, declare the metric
+    names they return in fields, and return a dict of metric values from collect();
+    collectors later in the list can rely on state that earlier ones left on the context.
+    """
+    name = None
+    fields = ()
+    requires_key = True
+
+    def collect(self, context):
+        raise NotImplementedError
+
+
+class QKDCollector(Collector):
+    name = "qkd"
+    fields = ("qkd_key_time", "qkd_key_bits", "qkd_aborted")
+    requires_key = False
+
+    def collect(self, context):
+        qkd = context.qkd = QKDProtocol(context.config["num_qubits"], context.config["error_threshold"],
+                                        noise=context.config["noise_level"])
+        try:
+            raw_key, key_time = measure_time(qkd.run_protocol)
+        except SecurityException:
+            context.qkd_aborted = True
+            return {"qkd_key_time": None, "qkd_key_bits": 0, "qkd_aborted": True}
+        context.qkd_aborted = False
+        context.raw_key = raw_key
+        context.encryption = Encryption(KeyDerivation().derive_key(raw_key, context.seed.to_bytes(16, "big")))
+        return {"qkd_key_time": key_time, "qkd_key_bits": key_length_bits(raw_key), "qkd_aborted": False}
+
+
+class EntropyCollector(Collector):
+    name = "entropy"
+    fields = ("qkd_key_entropy", "qkd_key_min_entropy", "qkd_key_bias", "qkd_key_quality_passed",
+              "p_monobit", "p_runs", "p_block_frequency", "p_serial_1", "p_serial_2") + tuple(
+        f"p_autocorrelation_{shift}" for shift in KeyQuality().shifts)
+
+    def collect(self, context):
+        report = KeyQuality().report(context.raw_key)
+        row = {
+            "qkd_key_entropy": report["shannon_entropy"],
+            "qkd_key_min_entropy": report["min_entropy"],
+            "qkd_key_bias": report["bias"],
+            "qkd_key_quality_passed": report["passed"],
+        }
+        row.update({f"p_{name}": value for name, value in report["p_values"].items()})
+        return row
+
+
+class EncryptionCollector(Collector):
+    name = "encryption"
+    fields = ("encryption_time", "decryption_time")
+
+    def collect(self, context):
+        data = context.message()
+        iv = os.urandom(AES.block_size)
+        ciphertext, encryption_time = measure_time(context.encryption.encrypt_message, iv, data)
+        _, decryption_time = measure_time(context.encryption.decrypt_message, iv, ciphertext)
+        return {"encryption_time": encryption_time, "decryption_time": decryption_time}
+
+
+class AESCollector(Collector):
+    name = "aes"
+    fields = ("aes_encryption_time", "aes_decryption_time")
+    requires_key = False
+
+    def collect(self, context):
+        aes_key = os.urandom(32)
+        iv = os.urandom(AES.block_size)
+        padded_data = pad(context.message(), AES.block_size)
+        aes_ciphertext, aes_encryption_time = measure_time(AES.new(aes_key, AES.MODE_CBC, iv).encrypt, padded_data)
+        _, aes_decryption_time = measure_time(AES.new(aes_key, AES.MODE_CBC, iv).decrypt, aes_ciphertext)
+        return {"aes_encryption_time": aes_encryption_time, "aes_decryption_time": aes_decryption_time}
+
+
+class BandwidthCollector(Collector):
+    name = "bandwidth"
+    fields = ("qubit_count", "reconciliation_data_size")
+
+    def collect(self, context):
+        key_bits = key_length_bits(context.raw_key)
+        return {
+            "qubit_count": context.config["num_qubits"],
+            "reconciliation_data_size": key_bits * 4,  # Approximate reconciliation data size
+        }
+
+
+class ErrorRateCollector(Collector):
+    name = "error_rate"
+    fields = ("error_rate", "eavesdropping_detected")
+    requires_key = False
+
+    def collect(self, context):
+        """
+        Reports the QBER the protocol estimated on its sample of sifted bits, with the
+        configured noise_level applied on the simulated quantum channel, and whether that
+        QBER made it abort. Needs the qkd collector to have run first.
+        """
+        if context.qkd is None:
+            return {"error_rate": None, "eavesdropping_detected": None}
+        return {"error_rate": context.qkd.last_error_rate, "eavesdropping_detected": context.qkd_aborted}
+
+
+class BruteForceCollector(Collector):
+    name = "brute_force"
+    fields = ("log2_brute_force_seconds", "log2_quantum_brute_force_seconds")
+
+    def collect(self, context):
+        key_bits = key_length_bits(context.raw_key)
+        return {
+            "log2_brute_force_seconds": float(log2_brute_force_seconds(key_bits)),
+            "log2_quantum_brute_force_seconds": float(log2_brute_force_seconds(key_bits, quantum=True)),
+        }
+
+
+COLLECTORS = {cls.name: cls for cls in (
+    QKDCollector, EntropyCollector, EncryptionCollector, AESCollector,
+    BandwidthCollector, ErrorRateCollector, BruteForceCollector,
+)}
+
+
+def run_once(collector_names, config, run_index, seed, include_key=False):
+    """
+    Runs every named collector once against a fresh context and returns the merged row.
+    With include_key the hex QKD key is returned under "raw_key" as well.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    context = RunContext(config, seed)
+    row = dict(config, run=run_index, seed=seed)
+    for name in collector_names:
+        collector = COLLECTORS[name]()
+        if collector.requires_key and context.raw_key is None:
+            continue
+        row.update(collector.collect(context))
+    if include_key:
+        row["raw_key"] = context.raw_key
+    return row
+
+
+def _run_batch(batch):
+    return [run_once(*unit) for unit in batch]
+
+
+def sweep(base=None, **ranges):
+    """
+    Expands a base configuration into the cartesian product of the given parameter ranges.
+    """
+    base = dict(DEFAULT_CONFIG, **(base or {}))
+    names = list(ranges)
+    return [dict(base, **dict(zip(names, values))) for values in itertools.product(*ranges.values())]
+
+
+class CSVSink:
+    def __init__(self, path, fieldnames=None):
+        """
+        Writes rows as CSV. The header comes from fieldnames or, when the sink is used by a
+        CollectionJob, from the fields its collectors declare, so a first run that aborted
+        early does not narrow the schema. Rows with undeclared fields raise ValueError.
+        """
+        self.file = open(path, "w", newline="")
+        self.fieldnames = fieldnames
+        self.writer = None
+
+    def start(self, fieldnames):
+        if self.fieldnames is None:
+            self.fieldnames = list(fieldnames)
+
+    def write(self, row):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames or list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLSink:
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def start(self, fieldnames):
+        pass
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CollectionJob:
+    def __init__(self, collectors, configs, repetitions=1, sinks=(), workers=1, batch_size=16, seed=0,
+                 cache=None):
+        """
+        Runs the named collectors `repetitions` times for each configuration.
+        Work is split into batches so that parallel runs amortize process overhead.
+        With a ResultCache, runs already computed for the same collectors, configuration,
+        seed and code version are read back instead of simulated again.
+        """
+        unknown = [name for name in collectors if name not in COLLECTORS]
+        if unknown:
+            raise KeyError(f"Unknown collectors: {', '.join(unknown)}")
+        self.collectors = list(collectors)
+        self.configs = list(configs)
+        self.repetitions = repetitions
+        self.sinks = list(sinks)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.seed = seed
+        self.cache = cache
+
+    def work_units(self):
+        index = 0
+        for config in self.configs:
+            for _ in range(self.repetitions):
+                yield self.collectors, config, index, self.seed + index, self.include_key
+                index += 1
+
+    def batches(self):
+        units = self.work_units()
+        while True:
+            batch = list(itertools.islice(units, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @property
+    def include_key(self):
+        return self.cache is not None and self.cache.store_keys
+
+    def fieldnames(self):
+        """
+        Every column a row can have: configuration keys, run and seed, then the fields each
+        collector declares.
+        """
+        names = dict.fromkeys(name for config in self.configs for name in config)
+        names.update(dict.fromkeys(["run", "seed"]))
+        for collector in self.collectors:
+            names.update(dict.fromkeys(COLLECTORS[collector].fields))
+        if self.include_key:
+            names["raw_key"] = None
+        return list(names)
+
+    def rows(self):
+        """
+        Yields result rows in work-unit order as batches complete. With several workers at
+        most 2 * workers batches are in flight, so memory stays bounded on long sweeps.
+        """
+        lookups = (self._lookup(batch) for batch in self.batches())
+        if self.workers <= 1:
+            for batch, cached, misses in lookups:
+                yield from self._merge(batch, cached, _run_batch(misses))
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for batch, cached, misses in lookups:
+                in_flight.append((batch, cached, executor.submit(_run_batch, misses)))
+                if len(in_flight) >= 2 * self.workers:
+                    batch, cached, future = in_flight.popleft()
+                    yield from self._merge(batch, cached, future.result())
+            while in_flight:
+                batch, cached, future = in_flight.popleft()
+                yield from self._merge(batch, cached, future.result())
+
+    def _lookup(self, batch):
+        """
+        Splits a batch into cached rows (None where missing) and the units still to run.
+        """
+        if self.cache is None:
+            return batch, [None] * len(batch), batch
+        cached = []
+        for collectors, config, index, seed, _ in batch:
+            hit = self.cache.get(self.cache.key_for(collectors, config, seed))
+            if hit is not None:
+                row, raw_key = hit
+                row = dict(row, run=index)
+                if self.include_key:
+                    row["raw_key"] = raw_key.hex() if raw_key else None
+                hit = row
+            cached.append(hit)
+        return batch, cached, [unit for unit, row in zip(batch, cached) if row is None]
+
+    def _merge(self, batch, cached, computed):
+        """
+        Interleaves computed rows back into batch order, storing them in the cache.
+        """
+        computed = iter(computed)
+        for (collectors, config, _, seed, _), row in zip(batch, cached):
+            if row is None:
+                row = next(computed)
+                if self.cache is not None:
+                    stored = {name: value for name, value in row.items() if name != "raw_key"}
+                    raw_key = bytes.fromhex(row["raw_key"]) if row.get("raw_key") else None
+                    self.cache.put(self.cache.key_for(collectors, config, seed), stored, raw_key)
+            yield row
+
+    def run(self, rows=None):
+        """
+        Streams every row to the sinks, closing them afterwards. Returns the number of rows.
+        rows replaces the local runner, e.g. with a distributed Coordinator's rows().
+        """
+        count = 0
+        for sink in self.sinks:
+            sink.start(self.fieldnames())
+        try:
+            for row in self.rows() if rows is None else rows:
+                for sink in self.sinks:
+                    sink.write(row)
+                count += 1
+                if count % 100 == 0:
+                    logging.info(f"Collected {count} rows.")
+        finally:
+            for sink in self.sinks:
+                sink.close()
+        if self.cache is not None:
+            logging.info(f"Result cache: {self.cache.stats}")
+        return count
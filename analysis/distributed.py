@@ -0,0 +1,343 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from analysis.collection import _run_batch
+from comms.serialization import MessageCodec
+
+CONTENT_TYPE = "application/octet-stream"
+
+
+class DistributedSweepError(Exception):
+    """
+    Raised when a work unit keeps failing on workers, or the coordinator is unreachable.
+    """
+    pass
+
+
+class Coordinator:
+    def __init__(self, job, host="127.0.0.1", port=0, lease_timeout=120.0, max_attempts=3):
+        """
+        Serves the batches of a CollectionJob to remote workers over HTTP. Each batch is a
+        work unit identified by its position in the sweep. A worker leases a unit, runs it
+        and posts the rows back, renewing the lease every lease_timeout / 3 seconds while
+        the batch runs. Units whose lease expires (the worker died or lost contact) are
+        handed out again. Rows are only accepted under a lease issued for that unit, and
+        results for units already completed are discarded, so every unit contributes
+        exactly one set of rows. A unit that fails max_attempts times aborts the sweep.
+
+        Requests and responses are MessageCodec messages (binary, compressed when large).
+        Rows are yielded in work-unit order and go through the job's result cache, if any.
+        port=0 picks a free port; see the url attribute.
+        """
+        self.job = job
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.codec = MessageCodec()
+
+        self._batches = enumerate(job.batches())
+        self._exhausted = False
+        self._pending = deque()   # unit ids waiting for a worker
+        self._units = {}          # unit id -> (batch, cached rows, units to run)
+        self._leases = {}         # unit id -> (lease number, deadline, worker)
+        self._issued = {}         # unit id -> every lease number handed out for it
+        self._attempts = {}
+        self._results = {}
+        self._next_lease = 0
+        self._error = None
+        self._workers = set()
+        self._released = set()
+        self.poll_interval = min(1.0, lease_timeout / 4)
+        self.stats = {"leased": 0, "renewed": 0, "completed": 0, "expired": 0, "failed": 0,
+                      "duplicates": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                handler = {"/lease": coordinator._lease, "/renew": coordinator._renew,
+                           "/result": coordinator._result, "/fail": coordinator._fail}.get(self.path)
+                if handler is None:
+                    self.send_error(404)
+                    return
+                try:
+                    length = int(self.headers["Content-Length"])
+                    if not 0 <= length <= coordinator.codec.max_size:
+                        raise ValueError(f"Content-Length {length} out of range")
+                    request = coordinator.codec.decode(self.rfile.read(length))
+                    reply = handler(request)
+                except (TypeError, ValueError, KeyError) as e:
+                    # Missing or malformed Content-Length, undecodable body or missing fields
+                    self.send_error(400, explain=repr(e))
+                    return
+                body = coordinator.codec.encode(reply)
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug("[Coordinator] " + format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="sweep-coordinator", daemon=True)
+        self._thread.start()
+        logging.info(f"Coordinator listening on {self.url}")
+        return self
+
+    def close(self):
+        """
+        Stops serving. If the sweep finished, first gives idle workers up to two poll
+        intervals to collect their "done" reply so they exit cleanly.
+        """
+        with self._lock:
+            if self._exhausted and not self._leases and self._error is None:
+                self._changed.wait_for(lambda: self._workers <= self._released, 2 * self.poll_interval)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _pull(self):
+        """
+        Takes the next batch from the job, completing it at once if the cache covers it.
+        Returns False when the sweep has no batches left. Called with the lock held.
+        """
+        if self._exhausted:
+            return False
+        try:
+            unit_id, batch = next(self._batches)
+        except StopIteration:
+            self._exhausted = True
+            self._changed.notify_all()
+            return False
+        batch, cached, misses = self.job._lookup(batch)
+        self._units[unit_id] = (batch, cached, misses)
+        if misses:
+            self._pending.append(unit_id)
+        else:
+            self._results[unit_id] = []
+            self._changed.notify_all()
+        return True
+
+    def _lease(self, request):
+        with self._lock:
+            if self._error is not None:
+                return {"done": True}
+            self._workers.add(request["worker"])
+            self._expire()
+            while not self._pending and self._pull():
+                pass
+            if not self._pending:
+                if self._exhausted and not self._leases:
+                    self._released.add(request["worker"])
+                    self._changed.notify_all()
+                    return {"done": True}
+                return {"wait": self.poll_interval}
+            unit_id = self._pending.popleft()
+            now = time.monotonic()
+            self._next_lease += 1
+            self._leases[unit_id] = (self._next_lease, now + self.lease_timeout, request["worker"])
+            self._issued.setdefault(unit_id, set()).add(self._next_lease)
+            self.stats["leased"] += 1
+            return {"unit": unit_id, "lease": self._next_lease, "units": self._units[unit_id][2],
+                    "renew": self.lease_timeout / 3}
+
+    def _renew(self, request):
+        """
+        Extends a live lease by lease_timeout. Returns accepted=False once the lease has
+        expired or the unit finished, so the worker knows its result may be discarded.
+        """
+        unit_id = request["unit"]
+        with self._lock:
+            lease = self._leases.get(unit_id)
+            if lease is None or lease[0] != request["lease"]:
+                return {"accepted": False}
+            self._leases[unit_id] = (lease[0], time.monotonic() + self.lease_timeout, lease[2])
+            self.stats["renewed"] += 1
+            return {"accepted": True}
+
+    def _expire(self):
+        """
+        Puts units whose lease ran out back in the queue. Called with the lock held.
+        """
+        now = time.monotonic()
+        for unit_id, (_, deadline, worker) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[unit_id]
+                self.stats["expired"] += 1
+                logging.warning(f"Lease on unit {unit_id} held by {worker} expired; reassigning.")
+                self._requeue(unit_id, f"lease expired on {worker}")
+
+    def _requeue(self, unit_id, reason):
+        self._attempts[unit_id] = self._attempts.get(unit_id, 0) + 1
+        if self._attempts[unit_id] >= self.max_attempts:
+            self._error = DistributedSweepError(
+                f"Work unit {unit_id} failed {self._attempts[unit_id]} times; last: {reason}")
+            self._changed.notify_all()
+        else:
+            self._pending.appendleft(unit_id)
+
+    def _result(self, request):
+        unit_id = request["unit"]
+        with self._lock:
+            if unit_id in self._results or unit_id not in self._units:
+                self.stats["duplicates"] += 1
+                return {"accepted": False}
+            if request["lease"] not in self._issued.get(unit_id, ()):
+                self.stats["rejected"] += 1
+                logging.warning(f"Rejected rows for unit {unit_id} from {request['worker']}: never leased to it.")
+                return {"accepted": False}
+            # An expired lease still counts: its rows are as good as a later worker's
+            del self._issued[unit_id]
+            self._leases.pop(unit_id, None)
+            if unit_id in self._pending:
+                self._pending.remove(unit_id)
+            self._results[unit_id] = request["rows"]
+            self.stats["completed"] += 1
+            self._changed.notify_all()
+            return {"accepted": True}
+
+    def _fail(self, request):
+        unit_id = request["unit"]
+        with self._lock:
+            lease = self._leases.get(unit_id)
+            if lease is None or lease[0] != request["lease"]:
+                return {"accepted": False}  # Stale report: the unit was reassigned or finished
+            del self._leases[unit_id]
+            self.stats["failed"] += 1
+            logging.warning(f"Unit {unit_id} failed on {request['worker']}: {request['error']}")
+            self._requeue(unit_id, request["error"])
+            return {"accepted": True}
+
+    def rows(self):
+        """
+        Yields result rows in work-unit order as workers report them. Units that finish
+        early are held until every earlier unit has arrived.
+        """
+        unit_id = 0
+        while True:
+            with self._lock:
+                while unit_id not in self._results:
+                    if self._error is not None:
+                        raise self._error
+                    if self._exhausted and unit_id not in self._units:
+                        return
+                    if not self._exhausted and unit_id not in self._units:
+                        self._pull()  # Keep the cache lookups moving while no worker asks
+                        continue
+                    self._changed.wait(self.poll_interval)
+                    self._expire()
+                batch, cached, _ = self._units.pop(unit_id)
+                rows = self._results.pop(unit_id)
+            yield from self.job._merge(batch, cached, rows)
+            unit_id += 1
+
+
+def _post(url, codec, message, retries, timeout):
+    """
+    POSTs a message and returns the decoded reply, retrying connection failures with
+    exponential backoff.
+    """
+    body = codec.encode(message)
+    for attempt in range(retries + 1):
+        try:
+            request = urllib.request.Request(url, data=body, headers={"Content-Type": CONTENT_TYPE})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return codec.decode(response.read())
+        except urllib.error.HTTPError as e:
+            raise DistributedSweepError(f"Coordinator at {url} rejected the request: {e}") from e
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+            if attempt == retries:
+                raise DistributedSweepError(f"Coordinator at {url} unreachable: {e}") from e
+            time.sleep(min(0.1 * 2 ** attempt, 5.0))
+
+
+def _heartbeat(url, codec, lease, name, stop, retries, timeout):
+    """
+    Renews a lease every lease["renew"] seconds until stop is set. Gives up quietly if the
+    coordinator no longer knows the lease or cannot be reached; the result is still posted.
+    """
+    message = {"unit": lease["unit"], "lease": lease["lease"], "worker": name}
+    while not stop.wait(lease["renew"]):
+        try:
+            if not _post(f"{url}/renew", codec, message, retries, timeout).get("accepted"):
+                logging.warning(f"Lease on unit {lease['unit']} was lost; it may be reassigned.")
+                return
+        except DistributedSweepError as e:
+            logging.warning(str(e))
+            return
+
+
+def run_worker(url, name=None, retries=5, timeout=60.0):
+    """
+    Leases work units from a coordinator, runs each batch and posts the rows back until
+    the sweep is done, renewing the lease from a heartbeat thread so long batches keep it.
+    A batch that raises is reported so the coordinator can retry it elsewhere. Returns the
+    number of units completed.
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    codec = MessageCodec()
+    completed = 0
+    while True:
+        reply = _post(f"{url}/lease", codec, {"worker": name}, retries, timeout)
+        if reply.get("done"):
+            return completed
+        if "wait" in reply:
+            time.sleep(reply["wait"])
+            continue
+        units = [tuple(unit) for unit in reply["units"]]
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat, args=(url, MessageCodec(), reply, name, stop, retries, timeout),
+                                     name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            rows = _run_batch(units)
+        except Exception:
+            _post(f"{url}/fail", codec, {"unit": reply["unit"], "lease": reply["lease"], "worker": name,
+                                         "error": traceback.format_exc(limit=3)}, retries, timeout)
+            continue
+        finally:
+            stop.set()
+            heartbeat.join()
+        _post(f"{url}/result", codec, {"unit": reply["unit"], "lease": reply["lease"], "worker": name,
+                                       "rows": rows}, retries, timeout)
+        completed += 1
+
+
+def _worker_process(url, index):
+    try:
+        completed = run_worker(url, name=f"{socket.gethostname()}:{os.getpid()}/{index}")
+        logging.info(f"Worker {index} finished after {completed} units.")
+    except DistributedSweepError as e:
+        logging.error(str(e))
+
+
+def start_workers(url, count):
+    """
+    Starts `count` worker processes on this host against the coordinator at url.
+    """
+    processes = [multiprocessing.Process(target=_worker_process, args=(url, index), daemon=True)
+                 for index in range(count)]
+    for process in processes:
+        process.start()
+    return processes
@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+from Crypto.Cipher import AES
+from comms.channel import Channel
+from comms.receiver import Receiver
+from comms.sender import Sender
+from crypto.encryption import Encryption
+from crypto.key_derivation import KeyDerivation
+from qkd.qkd_protocol import SecurityException
+from utils.histogram import LatencyHistogram
+
+SALT_SIZE = 16
+
+
+def parse_size_distribution(spec):
+    """
+    Parses a message-size distribution into a function (rng, n) -> sizes in bytes:
+    "fixed:N", "uniform:LOW:HIGH", "lognormal:MEDIAN:SIGMA" or "choice:A,B,C".
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        if kind == "fixed":
+            size = int(params)
+            return lambda rng, n: np.full(n, size, dtype=np.int64)
+        if kind == "uniform":
+            low, high = (int(value) for value in params.split(":"))
+            return lambda rng, n: rng.integers(low, high + 1, n)
+        if kind == "lognormal":
+            median, sigma = (float(value) for value in params.split(":"))
+            return lambda rng, n: np.maximum(1, rng.lognormal(np.log(median), sigma, n)).astype(np.int64)
+        if kind == "choice":
+            sizes = [int(value) for value in params.split(",")]
+            return lambda rng, n: rng.choice(sizes, n)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid message size distribution: {spec}")
+
+
+class MessagingPipeline:
+    def __init__(self, protocol, messages_per_key=100, retries=3, metrics=None):
+        """
+        The real QKD -> KDF -> Encryption -> Sender/Receiver path, shared by load-test
+        threads. The key is rotated every messages_per_key messages by whichever request
+        crosses the boundary, so key generation shows up in the latency tail as it would
+        in service. With a Metrics collector attached, each stage is timed as pipeline.*.
+        """
+        if messages_per_key < 1:
+            raise ValueError("messages_per_key must be at least 1.")
+        self.protocol = protocol
+        self.messages_per_key = messages_per_key
+        self.retries = retries
+        self.metrics = metrics
+        self.key_derivation = KeyDerivation()
+        self.channel = Channel()
+        self.sender = None
+        self.receiver = None
+        self.remaining = 0
+        self._lock = threading.Lock()
+
+    def _timer(self, name):
+        return nullcontext() if self.metrics is None else self.metrics.timer(f"pipeline.{name}")
+
+    def rotate_key(self):
+        for attempt in range(self.retries + 1):
+            try:
+                with self._timer("qkd"):
+                    raw_key = self.protocol.run_protocol()
+                break
+            except SecurityException:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"QKD session aborted (attempt {attempt + 1}); retrying.")
+        salt = self.channel.simulate_classical_channel(os.urandom(SALT_SIZE))
+        with self._timer("kdf"):
+            encryption = Encryption(self.key_derivation.derive_key(raw_key, salt))
+        self.sender, self.receiver = Sender(encryption), Receiver(encryption)
+        self.remaining = self.messages_per_key
+
+    def round_trip(self, message):
+        """
+        Encrypts, transmits and decrypts one message; raises ValueError on a mismatch.
+        """
+        with self._lock:
+            if self.remaining == 0:
+                self.rotate_key()
+            self.remaining -= 1
+            sender, receiver = self.sender, self.receiver
+        iv = os.urandom(AES.block_size)
+        with self._timer("encrypt"):
+            ciphertext = sender.send_message(iv, message)
+        ciphertext = self.channel.simulate_classical_channel(ciphertext, "ciphertext")
+        with self._timer("decrypt"):
+            decrypted = receiver.receive_message(iv, ciphertext)
+        if decrypted != message:
+            raise ValueError("Round trip produced a different message.")
+        if self.metrics is not None:
+            self.metrics.increment("pipeline.messages")
+            self.metrics.increment("pipeline.bytes", len(message))
+
+
+class LoadGenerator:
+    def __init__(self, pipeline, rate, duration, sizes="fixed:256", workers=8, seed=None):
+        """
+        Open-loop load: messages arrive as a Poisson process at `rate` per second for
+        `duration` seconds, independent of how fast earlier ones complete. Latency is measured
+        from each message's scheduled arrival, so queueing behind a slow request counts
+        against it and saturation is not hidden by the generator slowing down.
+        """
+        self.pipeline = pipeline
+        self.rate = rate
+        self.duration = duration
+        self.sizes = parse_size_distribution(sizes) if isinstance(sizes, str) else sizes
+        self.workers = workers
+        self.rng = np.random.default_rng(seed)
+
+    def schedule(self):
+        """
+        Returns arrival offsets and message sizes for the whole run.
+        """
+        expected = int(self.rate * self.duration * 1.2) + 16
+        arrivals = np.cumsum(self.rng.exponential(1 / self.rate, expected))
+        arrivals = arrivals[arrivals < self.duration]
+        return arrivals, self.sizes(self.rng, arrivals.size)
+
+    def run(self):
+        arrivals, sizes = self.schedule()
+        latency = LatencyHistogram()
+        service = LatencyHistogram()
+        futures = []
+        payload = os.urandom(int(sizes.max(initial=1)))
+        self.pipeline.rotate_key()  # Start from a warm key so the first message is not an outlier
+
+        def handle(scheduled, size):
+            started = time.perf_counter()
+            self.pipeline.round_trip(payload[:size])
+            finished = time.perf_counter()
+            latency.record(finished - scheduled)
+            service.record(finished - started)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            origin = time.perf_counter()
+            for offset, size in zip(arrivals, sizes):
+                delay = origin + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(handle, origin + offset, int(size)))
+        elapsed = time.perf_counter() - origin
+
+        # Every failure counts, not just the expected ones, so none vanish from the report
+        errors = Counter()
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                if not errors:
+                    logging.error(f"Load-test message failed: {e!r}")
+                errors[type(e).__name__] += 1
+
+        completed = latency.count
+        return {
+            "offered_rate": self.rate,
+            "duration": self.duration,
+            "messages": int(arrivals.size),
+            "completed": completed,
+            "errors": sum(errors.values()),
+            "error_types": dict(errors),
+            "throughput": completed / elapsed if elapsed else 0.0,
+            "bytes_per_second": float(sizes.sum()) / elapsed if elapsed else 0.0,
+            "elapsed": elapsed,
+            "latency": latency.summary(),
+            "service_time": service.summary(),
+        }
+
+
+def find_max_throughput(make_generator, start_rate=100.0, slo_p99=0.1, max_steps=12, tolerance=0.1):
+    """
+    Searches for the highest arrival rate the pipeline sustains: every message completes
+    without the backlog outlasting the run by more than slo_p99, and p99 latency stays
+    within slo_p99 seconds. The rate doubles
+    until a step fails, then bisects until the bracket is within `tolerance` (relative).
+    make_generator(rate) must return a fresh LoadGenerator. Returns (best_rate, reports).
+    """
+    reports = []
+
+    def sustained(rate):
+        report = make_generator(rate).run()
+        report["sustained"] = (report["completed"] == report["messages"] > 0
+                               and report["elapsed"] <= report["duration"] + slo_p99
+                               and report["latency"]["p99"] <= slo_p99)
+        reports.append(report)
+        return report["sustained"]
+
+    low, high = 0.0, None
+    rate = start_rate
+    for _ in range(max_steps):
+        if high is None:
+            if sustained(rate):
+                low, rate = rate, rate * 2
+            else:
+                high = rate
+                rate = (low + high) / 2
+            continue
+        if high - low <= tolerance * high:
+            break
+        if sustained(rate):
+            low = rate
+        else:
+            high = rate
+        rate = (low + high) / 2
+    return low, reports
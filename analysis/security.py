@@ -0,0 +1,132 @@
+import math
+import numpy as np
+from scipy.special import logsumexp
+from qkd.qkd_protocol import QKDProtocol, SecurityException
+from utils.metrics import Metrics
+
+SECONDS_PER_YEAR = 31536000
+LOG2_SECONDS_PER_YEAR = math.log2(SECONDS_PER_YEAR)
+LN2 = math.log(2)
+
+# Stage timers recorded by QKDProtocol.run_protocol when a Metrics collector is attached.
+PROTOCOL_STAGES = (
+    "qkd.generate_quantum_states",
+    "qkd.measure_quantum_states",
+    "qkd.reconcile_and_correct",
+    "qkd.privacy_amplification",
+)
+
+
+def key_length_bits(key):
+    """
+    Returns the length in bits of a key produced by QKDProtocol.run_protocol (a hex digest)
+    or of a bit sequence.
+    """
+    if isinstance(key, str):
+        return len(key) * 4
+    return len(key)
+
+
+def log2_brute_force_seconds(key_bits, ops_per_second=1e9, quantum=False):
+    """
+    Log2 of the seconds needed to search the whole key space, broadcasting over key lengths
+    and attacker speeds. Grover's algorithm halves the exponent.
+    """
+    key_bits = np.asarray(key_bits, dtype=float)
+    log2_trials = key_bits / 2 if quantum else key_bits
+    return log2_trials - np.log2(np.asarray(ops_per_second, dtype=float))
+
+
+def brute_force_grid(key_lengths, attacker_speeds, quantum=False):
+    """
+    Log2 brute-force seconds for every (key length, attacker speed) pair.
+    Rows follow key_lengths and columns follow attacker_speeds.
+    """
+    key_lengths = np.asarray(key_lengths, dtype=float)[:, None]
+    attacker_speeds = np.asarray(attacker_speeds, dtype=float)[None, :]
+    return log2_brute_force_seconds(key_lengths, attacker_speeds, quantum)
+
+
+def monte_carlo_break_probability(key_lengths, horizon_seconds, log10_speed_mean=9.0,
+                                  log10_speed_sigma=1.0, samples=10000, quantum=False, rng=None):
+    """
+    Estimates log2 of the probability that an attacker finds the key within the horizon,
+    drawing the attacker speed from a log-normal distribution. Works entirely in log space
+    so keys of any length stay finite. Returns one value per key length.
+    """
+    rng = np.random.default_rng(rng)
+    key_lengths = np.atleast_1d(np.asarray(key_lengths, dtype=float))
+    log2_speeds = rng.normal(log10_speed_mean, log10_speed_sigma, samples) * math.log2(10)
+
+    # P(success) = min(1, horizon * speed / keyspace) for a uniformly placed key.
+    log2_trials = key_lengths[:, None] / 2 if quantum else key_lengths[:, None]
+    log2_p = np.minimum(0.0, math.log2(horizon_seconds) + log2_speeds[None, :] - log2_trials)
+    return (logsumexp(log2_p * LN2, axis=1) - math.log(samples)) / LN2
+
+
+def benchmark_stages(num_qubits, runs=5, error_threshold=0.11):
+    """
+    Runs the real protocol and returns the mean seconds spent in each stage.
+    Aborted sessions are skipped.
+    """
+    metrics = Metrics()
+    qkd = QKDProtocol(num_qubits=num_qubits, error_threshold=error_threshold, metrics=metrics)
+    for _ in range(runs):
+        try:
+            qkd.run_protocol()
+        except SecurityException:
+            pass
+    timings = metrics.snapshot()["timings"]
+    return {stage: timings[stage]["mean"] for stage in PROTOCOL_STAGES if stage in timings}
+
+
+def calibrate_ops_per_qubit(num_qubits, clock_speed_ghz, runs=5):
+    """
+    Converts measured stage times into operations per qubit at the given clock speed.
+    Returns the total along with the per-stage breakdown.
+    """
+    stage_seconds = benchmark_stages(num_qubits, runs)
+    clock_hz = clock_speed_ghz * 1e9
+    per_stage = {stage: seconds * clock_hz / num_qubits for stage, seconds in stage_seconds.items()}
+    return sum(per_stage.values()), per_stage
+
+
+def log2_computing_cost(key_length_bits, num_qubits, num_repetitions, clock_speed_ghz, ops_per_qubit):
+    """
+    Log2 of the operations and seconds needed to simulate the protocol, vectorized over any
+    of the inputs. Mirrors brute_force.estimate_computing_power without overflowing.
+    """
+    log2_ops = (np.log2(np.asarray(ops_per_qubit, dtype=float))
+                + np.log2(np.asarray(num_qubits, dtype=float))
+                + np.log2(np.asarray(key_length_bits, dtype=float))
+                + np.log2(np.asarray(num_repetitions, dtype=float)))
+    log2_seconds = log2_ops - np.log2(np.asarray(clock_speed_ghz, dtype=float) * 1e9)
+    return log2_ops, log2_seconds
+
+
+def format_log2_seconds(log2_seconds):
+    """
+    Converts log2 seconds to a human-readable string, using powers of ten for huge values.
+    Infinite input (e.g. a brute-force time that overflowed to inf) is reported as such.
+    """
+    if log2_seconds == -math.inf:
+        return "0.00 seconds"
+    if log2_seconds == math.inf:
+        return "effectively infinite"
+    if math.isnan(log2_seconds):
+        raise ValueError("Cannot format a NaN duration.")
+    if log2_seconds < 64:
+        seconds = 2.0 ** log2_seconds
+        if seconds < 60:
+            return f"{seconds:.2f} seconds"
+        elif seconds < 3600:
+            return f"{seconds / 60:.2f} minutes"
+        elif seconds < 86400:
+            return f"{seconds / 3600:.2f} hours"
+        elif seconds < SECONDS_PER_YEAR:
+            return f"{seconds / 86400:.2f} days"
+        return f"{seconds / SECONDS_PER_YEAR:.2f} years"
+
+    log10_years = (log2_seconds - LOG2_SECONDS_PER_YEAR) * math.log10(2)
+    exponent = math.floor(log10_years)
+    return f"{10 ** (log10_years - exponent):.2f}e+{exponent} years"
@@ -0,0 +1,263 @@
+import math
+import numbers
+from analysis.collection import DEFAULT_CONFIG
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream in O(1) memory (Welford's algorithm).
+    Two instances can be merged, e.g. when aggregating results from several workers.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.01, max_buckets=1024):
+        """
+        Mergeable quantile sketch with logarithmic buckets (as in DDSketch): every quantile
+        is returned within relative_accuracy of a value actually seen. Positive and negative
+        values use mirrored bucket sets and exact zeros are counted apart, and results are
+        clamped to the exact minimum and maximum. If a bucket set
+        grows past max_buckets its smallest-magnitude buckets are collapsed, which only
+        affects quantiles in that extreme tail.
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def update(self, value):
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value == 0:
+            self.zeros += 1
+            return
+        buckets = self.positive if value > 0 else self.negative
+        key = self._key(abs(value))
+        buckets[key] = buckets.get(key, 0) + 1
+        if len(buckets) > self.max_buckets:
+            self._collapse(buckets)
+
+    def _collapse(self, buckets):
+        keys = sorted(buckets)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        target = excess[-1]
+        buckets[target] = sum(buckets.pop(key) for key in excess[:-1]) + buckets[target]
+
+    def merge(self, other):
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+            if len(mine) > self.max_buckets:
+                self._collapse(mine)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Value at quantile q in [0, 1]; None for an empty sketch.
+        """
+        if self.count == 0:
+            return None
+        return min(max(self._quantile(q), self.min), self.max)
+
+    def _quantile(self, q):
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class Downsampler:
+    def __init__(self, max_points=512):
+        """
+        Bounded time series over a stream: keeps at most max_points buckets of consecutive
+        values, each with its count, mean, min and max. When full, neighbouring buckets
+        are merged pairwise and each bucket then covers twice as many values, so memory
+        stays fixed however long the stream runs.
+        """
+        self.max_points = max_points
+        self.width = 1
+        self.buckets = []
+        self.total = 0
+
+    def update(self, value):
+        if self.buckets and self.buckets[-1][0] < self.width:
+            count, mean, low, high = self.buckets[-1]
+            count += 1
+            self.buckets[-1] = [count, mean + (value - mean) / count, min(low, value), max(high, value)]
+        else:
+            self.buckets.append([1, value, value, value])
+            if len(self.buckets) > self.max_points:
+                self._halve()
+        self.total += 1
+
+    def _halve(self):
+        merged = []
+        for index in range(0, len(self.buckets), 2):
+            pair = self.buckets[index:index + 2]
+            count = sum(bucket[0] for bucket in pair)
+            mean = sum(bucket[0] * bucket[1] for bucket in pair) / count
+            merged.append([count, mean, min(bucket[2] for bucket in pair), max(bucket[3] for bucket in pair)])
+        self.buckets = merged
+        self.width *= 2
+
+    def series(self):
+        """
+        Returns (first run index, count, mean, min, max) per bucket.
+        """
+        points = []
+        start = 0
+        for count, mean, low, high in self.buckets:
+            points.append((start, count, mean, low, high))
+            start += count
+        return points
+
+
+class MetricAggregate:
+    """
+    RunningStats, QuantileSketch and Downsampler of one metric. Non-finite values (NaN,
+    +inf, -inf) are only counted, since the sketches and running moments need real numbers.
+    """
+    def __init__(self, relative_accuracy, series_points):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.series = Downsampler(series_points)
+        self.nonfinite = 0
+
+    def update(self, value):
+        if not math.isfinite(value):
+            self.nonfinite += 1
+            return
+        self.stats.update(value)
+        self.sketch.update(value)
+        self.series.update(value)
+
+    def summary(self, quantiles):
+        empty = self.stats.count == 0
+        entry = {"count": self.stats.count, "nonfinite": self.nonfinite,
+                 "mean": None if empty else self.stats.mean, "std": None if empty else self.stats.std(),
+                 "min": None if empty else self.stats.min, "max": None if empty else self.stats.max}
+        for q in quantiles:
+            entry[f"p{q * 100:g}"] = self.sketch.quantile(q)
+        return entry
+
+
+class StreamingAggregator:
+    def __init__(self, relative_accuracy=0.01, series_points=512, quantiles=(0.5, 0.9, 0.99), group_by=None):
+        """
+        Folds result rows into a MetricAggregate per metric as runs finish. Rows are grouped
+        by the values of their group_by fields (default: the sweep configuration keys of
+        analysis.collection.DEFAULT_CONFIG), so runs from different sweep points are never
+        merged into one distribution, and those fields are not aggregated themselves.
+        Numeric and boolean fields are aggregated; None, strings and the bookkeeping fields
+        of a run are skipped. Memory is bounded per metric and group, independent of the
+        number of runs.
+        """
+        if group_by is None:
+            group_by = tuple(DEFAULT_CONFIG)
+        self.relative_accuracy = relative_accuracy
+        self.series_points = series_points
+        self.quantiles = quantiles
+        self.group_by = tuple(group_by)
+        self.groups = {}  # group values -> {"rows": count, "metrics": {name: MetricAggregate}}
+        self.rows = 0
+
+    def update(self, row):
+        self.rows += 1
+        key = tuple(row.get(name) for name in self.group_by)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {"rows": 0, "metrics": {}}
+        group["rows"] += 1
+        skipped = set(self.group_by) | {"run", "seed"}
+        for name, value in row.items():
+            if name in skipped or not isinstance(value, numbers.Real):
+                continue
+            entry = group["metrics"].get(name)
+            if entry is None:
+                entry = group["metrics"][name] = MetricAggregate(self.relative_accuracy, self.series_points)
+            entry.update(float(value))
+
+    def update_many(self, rows):
+        for row in rows:
+            self.update(row)
+        return self
+
+    def summary(self):
+        """
+        Returns one plain dict per group, in first-seen order: its configuration, its row
+        count and, per metric, count, nonfinite, mean, std, min, max and the configured
+        quantiles.
+        """
+        return [{"config": dict(zip(self.group_by, key)), "rows": group["rows"],
+                 "metrics": {name: entry.summary(self.quantiles) for name, entry in group["metrics"].items()}}
+                for key, group in self.groups.items()]
+
+    def series(self, name, config=None):
+        """
+        Downsampled series of a metric. config selects the group and may be omitted when
+        there is only one.
+        """
+        if config is None:
+            if len(self.groups) != 1:
+                raise KeyError("config is required when rows span several groups.")
+            (group,) = self.groups.values()
+        else:
+            group = self.groups[tuple(config.get(field) for field in self.group_by)]
+        return group["metrics"][name].series.series()
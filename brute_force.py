@@ -1,5 +1,13 @@
 import math
+import numpy as np
 from qkd.qkd_protocol import QKDProtocol
+from analysis.security import (
+    calibrate_ops_per_qubit,
+    format_log2_seconds,
+    key_length_bits,
+    log2_brute_force_seconds,
+    log2_computing_cost,
+)
 
 def brute_force_time(key_length, quantum=True, classical_speed=1e9):
     """
@@ -11,39 +19,25 @@ def brute_force_time(key_length, quantum=True, classical_speed=1e9):
     - classical_speed: Number of operations per second (default is 1 billion).
     
     Returns:
-    - Estimated time in seconds.
+    - Estimated time in seconds (inf once it exceeds the float range).
     """
-    total_keys = 2 ** key_length
-
-    # Grover's algorithm reduces brute force attempts to sqrt(total_keys)
-    effective_keys = math.sqrt(total_keys) if quantum else total_keys
-
-    # Estimate time based on classical speed
-    time_seconds = effective_keys / classical_speed
-    return time_seconds
+    # Computed in log space so long QKD keys do not overflow
+    with np.errstate(over='ignore'):
+        return float(np.exp2(log2_brute_force_seconds(key_length, classical_speed, quantum)))
 
 def display_time(seconds):
     """
     Convert time in seconds to human-readable format.
     """
-    if seconds < 60:
-        return f"{seconds:.2f} seconds"
-    elif seconds < 3600:
-        return f"{seconds / 60:.2f} minutes"
-    elif seconds < 86400:
-        return f"{seconds / 3600:.2f} hours"
-    elif seconds < 31536000:
-        return f"{seconds / 86400:.2f} days"
-    else:
-        return f"{seconds / 31536000:.2f} years"
+    return format_log2_seconds(math.log2(seconds) if seconds > 0 else -math.inf)
 
 def compare_brute_force(qkd_key_length, aes_key_length, quantum=False):
     """
     Compare brute force times for QKD and AES keys.
     """
     # Brute force time estimates
-    qkd_brute_force_time = display_time(2 ** (qkd_key_length / (2 if quantum else 1)) / (10**9))
-    aes_brute_force_time = display_time(2 ** (aes_key_length / (2 if quantum else 1)) / (10**9))
+    qkd_brute_force_time = format_log2_seconds(log2_brute_force_seconds(qkd_key_length, 1e9, quantum))
+    aes_brute_force_time = format_log2_seconds(log2_brute_force_seconds(aes_key_length, 1e9, quantum))
 
     print("--- Brute Force Time Comparison ---")
     print(f"QKD Key Length: {qkd_key_length} bits")
@@ -52,7 +46,8 @@ def compare_brute_force(qkd_key_length, aes_key_length, quantum=False):
     print("Time to brute force QKD:", qkd_brute_force_time)
     print("Time to brute force AES:", aes_brute_force_time)
 
-def estimate_computing_power(key_length_bits, num_qubits, num_repetitions, clock_speed_ghz):
+def estimate_computing_power(key_length_bits, num_qubits, num_repetitions, clock_speed_ghz,
+                             operations_per_qubit=None):
     """
     Estimate the computational power required to run a QKD simulation.
 
@@ -61,22 +56,21 @@ def estimate_computing_power(key_length_bits, num_qubits, num_repetitions, clock
     - num_qubits: Number of qubits processed per run.
     - num_repetitions: Number of protocol repetitions for key generation.
     - clock_speed_ghz: Clock speed of the hardware in GHz.
+    - operations_per_qubit: Operations per qubit; calibrated from a benchmark of the real
+      pipeline when omitted.
 
     Returns:
     - total_operations: Total number of operations required.
     - time_required_seconds: Estimated time required for simulation (in seconds).
     """
-    # Estimate operations per key bit
-    operations_per_qubit = 1000  # Assume 1000 operations per qubit for error correction, privacy amplification, etc.
-    operations_per_bit = operations_per_qubit * num_qubits
-
-    # Total operations
-    total_operations = operations_per_bit * key_length_bits * num_repetitions
+    if operations_per_qubit is None:
+        operations_per_qubit, _ = calibrate_ops_per_qubit(num_qubits, clock_speed_ghz)
 
-    # Compute time required (assuming 1 GHz = 1 billion operations per second)
-    time_required_seconds = total_operations / (clock_speed_ghz * 1e9)
-
-    return total_operations, time_required_seconds
+    log2_ops, log2_seconds = log2_computing_cost(
+        key_length_bits, num_qubits, num_repetitions, clock_speed_ghz, operations_per_qubit
+    )
+    with np.errstate(over='ignore'):
+        return float(np.exp2(log2_ops)), float(np.exp2(log2_seconds))
 
 
 def display_results(total_operations, time_required_seconds, clock_speed_ghz):
@@ -98,7 +92,7 @@ if __name__ == "__main__":
 
     # Generate a key
     qkd_key = qkd_protocol.run_protocol()
-    qkd_key_length = len(qkd_key)
+    qkd_key_length = key_length_bits(qkd_key)
 
     # AES key length (e.g., AES-256)
     aes_key_length = 256
@@ -1,5 +1,7 @@
 from .sender import Sender
 from .receiver import Receiver
 from .channel import Channel
+from .wire import WireCodec
+from .serialization import MessageCodec
 
-__all__ = ['Sender', 'Receiver', 'Channel']
+__all__ = ['Sender', 'Receiver', 'Channel', 'WireCodec', 'MessageCodec']
@@ -0,0 +1,110 @@
+import numpy as np
+from comms.channel import Channel
+from qkd.key_management import KeyPool
+from qkd.qkd_protocol import SecurityException
+
+PRIME = (1 << 31) - 1  # Mersenne prime; products of two residues fit in int64
+BLOCK_BYTES = 3        # 24-bit message blocks are always below PRIME
+LANE_BYTES = 4
+
+
+def _residues(material, count):
+    """
+    Turns 4-byte chunks of key material into residues mod PRIME.
+    """
+    words = np.frombuffer(material, dtype=">u4")[:count].astype(np.int64)
+    return words % PRIME
+
+
+class Authenticator:
+    def __init__(self, key_pool, lanes=4):
+        """
+        Wegman-Carter authentication with a multi-lane polynomial hash over GF(2^31 - 1).
+        Each lane has its own evaluation point, taken once from the key pool. Every tag then
+        consumes a fresh one-time pad of lanes * 4 bytes. For a message of n blocks the
+        forgery probability is about ((n + 2) / 2^31) ** lanes.
+        Sender and verifier must start from identical pools and process messages in the
+        same order.
+        """
+        self.lanes = lanes
+        self.key_pool = key_pool
+        self.hash_keys = _residues(key_pool.take(lanes * LANE_BYTES), lanes)
+        self.tag_size = lanes * LANE_BYTES
+
+    @classmethod
+    def from_pool(cls, pool, reserve_bytes, lanes=4):
+        """
+        Reserves a slice of an existing QKD key pool for authentication only.
+        """
+        reserved = KeyPool()
+        reserved.add(pool.take(reserve_bytes))
+        return cls(reserved, lanes)
+
+    def hash_batch(self, messages):
+        """
+        Evaluates the polynomial hash of every message at once. Messages are left-padded
+        with zero blocks to a common length, which leaves Horner's rule unchanged, and end
+        with a length block so that padding cannot cause collisions.
+        """
+        lengths = np.array([len(message) for message in messages], dtype=np.int64)
+        num_blocks = -(-int(lengths.max(initial=0)) // BLOCK_BYTES)
+        padded = np.zeros((len(messages), num_blocks * BLOCK_BYTES), dtype=np.uint8)
+        for row, message in enumerate(messages):
+            if len(message):
+                padded[row, padded.shape[1] - len(message):] = np.frombuffer(message, dtype=np.uint8)
+        blocks = padded.reshape(len(messages), num_blocks, BLOCK_BYTES).astype(np.int64)
+        blocks = (blocks[:, :, 0] << 16) | (blocks[:, :, 1] << 8) | blocks[:, :, 2]
+
+        keys = self.hash_keys[None, :]
+        digest = np.zeros((len(messages), self.lanes), dtype=np.int64)
+        for column in range(num_blocks):
+            digest = (digest * keys + blocks[:, column, None]) % PRIME
+        digest = (digest * keys + lengths[:, None] % PRIME) % PRIME
+        return digest * keys % PRIME
+
+    def tag_batch(self, messages, pad_material=None):
+        """
+        Returns one tag per message: the hash plus a fresh one-time pad, mod PRIME per lane.
+        The pads are taken from the pool unless the caller supplies len(messages) * tag_size
+        bytes of unused key material itself.
+        """
+        if pad_material is None:
+            pad_material = self.key_pool.take(len(messages) * self.tag_size)
+        pads = _residues(pad_material, len(messages) * self.lanes)
+        tags = (self.hash_batch(messages) + pads.reshape(len(messages), self.lanes)) % PRIME
+        return [row.astype(">u4").tobytes() for row in tags]
+
+    def verify_batch(self, messages, tags, pad_material=None):
+        """
+        Checks a batch of tags, consuming the same pads as the sender (or using the given
+        pad material). Returns a boolean per message.
+        """
+        expected = self.tag_batch(messages, pad_material)
+        return [a == b for a, b in zip(expected, tags)]
+
+
+class AuthenticatedChannel(Channel):
+    def __init__(self, sender_auth, receiver_auth):
+        """
+        Classical channel that tags every message at the sender and verifies it at the
+        receiver, so post-processing can trust each message as soon as it arrives.
+        """
+        super().__init__()
+        self.sender_auth = sender_auth
+        self.receiver_auth = receiver_auth
+
+    def simulate_classical_channel(self, data, kind="other"):
+        return self.simulate_classical_batch([data], kind)[0]
+
+    def simulate_classical_batch(self, messages, kind="other"):
+        """
+        Tags and sends a batch of messages, verifying all of them on arrival.
+        Raises SecurityException if any tag does not match.
+        """
+        messages = [bytes(memoryview(message).cast("B")) for message in messages]
+        tags = self.sender_auth.tag_batch(messages)
+        for message, tag in zip(messages, tags):
+            super().simulate_classical_channel(message + tag, kind)
+        if not all(self.receiver_auth.verify_batch(messages, tags)):
+            raise SecurityException("Classical message failed authentication.")
+        return messages
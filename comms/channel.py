@@ -1,6 +1,12 @@
+import logging
 import random
 
 class Channel:
+    def __init__(self):
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.bytes_by_kind = {}
+
     def simulate_quantum_channel(self, qubits):
         """
         Simulates the behavior of a quantum channel, including potential noise.
@@ -9,13 +15,25 @@ class Channel:
         noisy_qubits = [q ^ 1 if random.random() < 0.1 else q for q in qubits]
         return noisy_qubits
 
-    def simulate_classical_channel(self, data):
-        """
-        Simulates the classical communication channel.
-        """
-        print("[Channel] Sending data over classical channel...")
+    def simulate_classical_channel(self, data, kind="other"):
+        """
+        Simulates the classical communication channel, counting the bytes of binary payloads.
+        """
+        logging.debug("[Channel] Sending data over classical channel...")
+        self.messages_sent += 1
+        try:
+            size = memoryview(data).nbytes
+        except TypeError:
+            return data  # Unencoded Python objects have no wire size
+        self.bytes_sent += size
+        self.bytes_by_kind[kind] = self.bytes_by_kind.get(kind, 0) + size
         return data
 
+    def reset_counters(self):
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.bytes_by_kind = {}
+
     def introduce_noise(self, qubits):
         """
         Adds noise to the quantum channel.
@@ -1,9 +1,14 @@
+import logging
+from comms.serialization import MessageCodec
+
 class Receiver:
-    def __init__(self, encryption_module):
+    def __init__(self, encryption_module, codec=None):
         """
-        Initializes the receiver with the encryption module.
+        Initializes the receiver with the encryption module and the codec used for
+        structured messages. Decoding reads the format from each message's header.
         """
         self.encryption = encryption_module
+        self.codec = codec or MessageCodec()
 
     def receive_message(self, iv, encrypted_message):
         """
@@ -13,6 +18,19 @@ class Receiver:
         self.log_incoming_message(message)
         return message
 
+    def receive_structured(self, iv, encrypted_message):
+        """
+        Decrypts a message produced by Sender.send_structured and decodes it.
+        """
+        return self.decode_message(self.receive_message(iv, encrypted_message))
+
+    def decode_message(self, message):
+        """
+        Decompresses and deserializes a decrypted structured message. Raises ValueError
+        for malformed or oversized input.
+        """
+        return self.codec.decode(message)
+
     def validate_message(self, message):
         """
         Ensures the integrity and authenticity of the received message.
@@ -23,4 +41,4 @@ class Receiver:
         """
         Logs incoming messages for debugging or record-keeping.
         """
-        print(f"[Receiver] Incoming message logged: {message}")
+        logging.debug("[Receiver] Incoming message logged: %s", message)
@@ -1,11 +1,15 @@
 import json
+import logging
+from comms.serialization import MessageCodec
 
 class Sender:
-    def __init__(self, encryption_module):
+    def __init__(self, encryption_module, codec=None):
         """
-        Initializes the sender with the encryption module.
+        Initializes the sender with the encryption module and the codec used for
+        structured messages (compact binary with adaptive compression by default).
         """
         self.encryption = encryption_module
+        self.codec = codec or MessageCodec()
 
     def send_message(self, iv, message):
         """
@@ -15,9 +19,21 @@ class Sender:
         self.log_outgoing_message(message)
         return encrypted_message
 
+    def send_structured(self, iv, message):
+        """
+        Serializes, compresses and encrypts a structured message.
+        """
+        return self.send_message(iv, self.encode_message(message))
+
+    def encode_message(self, message):
+        """
+        Serializes and compresses a structured message with the codec, returning bytes.
+        """
+        return self.codec.encode(message)
+
     def prepare_message(self, message):
         """
-        Prepares the message for encryption by serializing it.
+        Prepares the message for encryption by serializing it to a JSON string.
         """
         return json.dumps(message)
 
@@ -25,4 +41,4 @@ class Sender:
         """
         Logs outgoing messages for debugging or record-keeping.
         """
-        print(f"[Sender] Outgoing message logged: {message}")
+        logging.debug("[Sender] Outgoing message logged: %s", message)
@@ -0,0 +1,274 @@
+import json
+import struct
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+SERIALIZER_JSON = 0
+SERIALIZER_BINARY = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+# Binary format type tags
+TAG_NONE = 0x00
+TAG_FALSE = 0x01
+TAG_TRUE = 0x02
+TAG_INT = 0x03    # zigzag varint
+TAG_FLOAT = 0x04  # IEEE 754 double, big-endian
+TAG_STR = 0x05    # varint length + UTF-8
+TAG_BYTES = 0x06  # varint length + raw bytes
+TAG_LIST = 0x07   # varint count + items
+TAG_DICT = 0x08   # varint count + key/value pairs
+
+FLOAT = struct.Struct(">d")
+PROBE_SIZE = 16384  # Large payloads are only compressed if this prefix compresses well
+MAX_MESSAGE_SIZE = 64 << 20  # Decompressed size limit, so small inputs cannot expand without bound
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+
+def _read_varint(view, offset):
+    value = shift = 0
+    while True:
+        byte = view[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class JSONSerializer:
+    serializer_id = SERIALIZER_JSON
+
+    def encode(self, obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def encode_parts(self, obj):
+        return [self.encode(obj)]
+
+    def decode(self, buffer):
+        return json.loads(bytes(buffer))
+
+
+class BinarySerializer:
+    """
+    Compact tagged binary encoding of None, bools, ints, floats, str, bytes, lists and
+    dicts. bytes values are never copied while encoding (they are referenced until the final
+    join) and are returned as memoryview slices of the input when decoding.
+    """
+    serializer_id = SERIALIZER_BINARY
+
+    def encode(self, obj):
+        return b"".join(self.encode_parts(obj))
+
+    def encode_parts(self, obj):
+        """
+        Returns the encoding as a list of byte chunks, with bytes fields included by reference.
+        """
+        parts = []
+        self._encode(obj, parts)
+        return parts
+
+    def _encode(self, obj, parts):
+        if obj is None:
+            parts.append(bytes([TAG_NONE]))
+        elif obj is True or obj is False:
+            parts.append(bytes([TAG_TRUE if obj else TAG_FALSE]))
+        elif isinstance(obj, int):
+            parts.append(bytes([TAG_INT]) + _varint((obj << 1) ^ -1 if obj < 0 else obj << 1))
+        elif isinstance(obj, float):
+            parts.append(bytes([TAG_FLOAT]) + FLOAT.pack(obj))
+        elif isinstance(obj, str):
+            encoded = obj.encode("utf-8")
+            parts.append(bytes([TAG_STR]) + _varint(len(encoded)))
+            parts.append(encoded)
+        elif isinstance(obj, (bytes, bytearray, memoryview)):
+            view = memoryview(obj).cast("B")
+            parts.append(bytes([TAG_BYTES]) + _varint(view.nbytes))
+            parts.append(view)
+        elif isinstance(obj, (list, tuple)):
+            parts.append(bytes([TAG_LIST]) + _varint(len(obj)))
+            for item in obj:
+                self._encode(item, parts)
+        elif isinstance(obj, dict):
+            parts.append(bytes([TAG_DICT]) + _varint(len(obj)))
+            for key, value in obj.items():
+                self._encode(key, parts)
+                self._encode(value, parts)
+        else:
+            raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+    def decode(self, buffer):
+        view = memoryview(buffer).cast("B")
+        obj, offset = self._decode(view, 0)
+        if offset != view.nbytes:
+            raise ValueError("Trailing data after serialized message.")
+        return obj
+
+    def _decode(self, view, offset):
+        tag = view[offset]
+        offset += 1
+        if tag == TAG_NONE:
+            return None, offset
+        if tag in (TAG_FALSE, TAG_TRUE):
+            return tag == TAG_TRUE, offset
+        if tag == TAG_INT:
+            value, offset = _read_varint(view, offset)
+            return (value >> 1) ^ -(value & 1), offset
+        if tag == TAG_FLOAT:
+            return FLOAT.unpack_from(view, offset)[0], offset + FLOAT.size
+        if tag in (TAG_STR, TAG_BYTES):
+            length, offset = _read_varint(view, offset)
+            if offset + length > view.nbytes:
+                raise ValueError("Truncated serialized message.")
+            field = view[offset:offset + length]
+            return (str(field, "utf-8") if tag == TAG_STR else field), offset + length
+        if tag in (TAG_LIST, TAG_DICT):
+            count, offset = _read_varint(view, offset)
+            if count > view.nbytes - offset:
+                raise ValueError("Truncated serialized message.")
+        if tag == TAG_LIST:
+            items = []
+            for _ in range(count):
+                item, offset = self._decode(view, offset)
+                items.append(item)
+            return items, offset
+        if tag == TAG_DICT:
+            result = {}
+            for _ in range(count):
+                key, offset = self._decode(view, offset)
+                result[bytes(key) if isinstance(key, memoryview) else key], offset = self._decode(view, offset)
+            return result, offset
+        raise ValueError(f"Unknown type tag: {tag}")
+
+
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "binary": BinarySerializer,
+}
+SERIALIZERS_BY_ID = {cls.serializer_id: cls for cls in SERIALIZERS.values()}
+
+
+class Compressor:
+    def __init__(self, threshold=512, algorithm="auto", level=None):
+        """
+        Compresses payloads of at least `threshold` bytes with zstd when it is installed
+        (algorithm="auto") or zlib, keeping the result only if it is actually smaller.
+        Payloads much larger than PROBE_SIZE are first probed with their prefix, so
+        already-compressed or encrypted data is not run through the compressor in full.
+        """
+        if algorithm == "auto":
+            algorithm = "zstd" if zstandard is not None else "zlib"
+        if algorithm == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package.")
+        if algorithm not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown compression algorithm: {algorithm}")
+        self.threshold = threshold
+        self.algorithm = algorithm
+        if algorithm == "zstd":
+            self.compression_id = COMPRESSION_ZSTD
+            self._compress = zstandard.ZstdCompressor(level=level or 3).compress
+        else:
+            self.compression_id = COMPRESSION_ZLIB
+            self._compress = lambda data: zlib.compress(data, level or 6)
+
+    def compress(self, payload):
+        """
+        Returns (compression id, payload), leaving small or incompressible payloads as they are.
+        """
+        if len(payload) < self.threshold:
+            return COMPRESSION_NONE, payload
+        if len(payload) > 4 * PROBE_SIZE and len(self._compress(payload[:PROBE_SIZE])) > 0.9 * PROBE_SIZE:
+            return COMPRESSION_NONE, payload
+        compressed = self._compress(payload)
+        if len(compressed) >= len(payload):
+            return COMPRESSION_NONE, payload
+        return self.compression_id, compressed
+
+    def worthwhile(self, size):
+        return size >= self.threshold
+
+
+def decompress(compression_id, payload, max_size=MAX_MESSAGE_SIZE):
+    """
+    Reverses Compressor.compress. Raises ValueError for corrupt or truncated data and for
+    payloads that would expand beyond max_size bytes.
+    """
+    if compression_id == COMPRESSION_NONE:
+        return payload
+    if compression_id == COMPRESSION_ZLIB:
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(payload, max_size)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"Decompressed message exceeds {max_size} bytes.")
+        if not decompressor.eof:
+            raise ValueError("Truncated compressed message.")
+        return data
+    if compression_id == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("Message is zstd-compressed but the zstandard package is not installed.")
+        with zstandard.ZstdDecompressor().stream_reader(bytes(payload)) as reader:
+            data = reader.read(max_size + 1)
+        if len(data) > max_size:
+            raise ValueError(f"Decompressed message exceeds {max_size} bytes.")
+        return data
+    raise ValueError(f"Unknown compression id: {compression_id}")
+
+
+class MessageCodec:
+    def __init__(self, serializer="binary", compression_threshold=512, compression="auto",
+                 max_size=MAX_MESSAGE_SIZE):
+        """
+        Serializes structured messages and compresses them adaptively. The first byte of
+        every encoded message records the serializer (low nibble) and compression (high
+        nibble), so the decoder needs no configuration. Decoding refuses messages that
+        decompress to more than max_size bytes.
+        """
+        self.serializer = SERIALIZERS[serializer]() if isinstance(serializer, str) else serializer
+        self.compressor = None if compression is None else Compressor(compression_threshold, compression)
+        self.max_size = max_size
+
+    def encode(self, obj):
+        """
+        Returns header || payload. Uncompressed messages are assembled with a single join,
+        so bytes fields are copied exactly once.
+        """
+        parts = self.serializer.encode_parts(obj)
+        serializer_id = self.serializer.serializer_id
+        if self.compressor is not None and self.compressor.worthwhile(sum(len(part) for part in parts)):
+            compression_id, payload = self.compressor.compress(b"".join(parts))
+            return bytes([compression_id << 4 | serializer_id]) + payload
+        return b"".join([bytes([COMPRESSION_NONE << 4 | serializer_id])] + parts)
+
+    def decode(self, message):
+        """
+        Decodes a message from encode(). Any malformed input raises ValueError.
+        """
+        view = memoryview(message).cast("B")
+        if not view.nbytes:
+            raise ValueError("Empty message.")
+        header = view[0]
+        serializer = SERIALIZERS_BY_ID.get(header & 0x0F)
+        if serializer is None:
+            raise ValueError(f"Unknown serializer id: {header & 0x0F}")
+        try:
+            return serializer().decode(decompress(header >> 4, view[1:], self.max_size))
+        except (IndexError, struct.error, zlib.error, RecursionError, TypeError) as e:
+            raise ValueError(f"Malformed message: {e}") from e
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                raise ValueError(f"Malformed message: {e}") from e
+            raise
@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import os
+import struct
+from collections import OrderedDict
+from Crypto.Cipher import AES
+from crypto.encryption import Encryption
+from crypto.key_derivation import KeyDerivation
+from comms.sender import Sender
+from comms.receiver import Receiver
+from qkd.qkd_protocol import SecurityException
+
+SESSION_ID_SIZE = 8
+ENVELOPE_HEADER = struct.Struct(">8sQ")  # session id, sequence number
+MAC_SIZE = hashlib.sha256().digest_size
+MAC_LABEL = b"qkd-session-mac"
+
+
+class ReplayWindow:
+    def __init__(self, size=1024):
+        """
+        Sliding-window replay detection over sequence numbers, kept as one integer bitmap.
+        Bit k is set when sequence number highest - k has been accepted.
+        """
+        self.size = size
+        self.highest = -1
+        self.bitmap = 0
+
+    def check(self, sequence):
+        """
+        Returns True if the sequence number is new and still inside the window.
+        """
+        if sequence > self.highest:
+            return True
+        offset = self.highest - sequence
+        return offset < self.size and not (self.bitmap >> offset) & 1
+
+    @classmethod
+    def retired(cls, size, highest):
+        """
+        Window for a session whose state was evicted: everything up to highest counts as seen.
+        """
+        window = cls(size)
+        window.highest = highest
+        window.bitmap = (1 << size) - 1
+        return window
+
+    def update(self, sequence):
+        if sequence > self.highest:
+            shift = sequence - self.highest
+            self.bitmap = ((self.bitmap << shift) | 1) & ((1 << self.size) - 1) if shift < self.size else 1
+            self.highest = sequence
+        else:
+            self.bitmap |= 1 << (self.highest - sequence)
+
+
+class PeerContext:
+    def __init__(self, peer, key):
+        """
+        Cipher state for one peer: the Encryption module with its Sender and Receiver, an
+        ECB cipher used to turn nonces into IVs, an HMAC key derived separately from the
+        cipher key, and the outbound session id and sequence.
+        """
+        encryption = Encryption(key)
+        self.peer = peer
+        self.sender = Sender(encryption)
+        self.receiver = Receiver(encryption)
+        self.iv_cipher = AES.new(key, AES.MODE_ECB)
+        self.mac_key = hmac.new(key, MAC_LABEL, hashlib.sha256).digest()
+        self.session_id = os.urandom(SESSION_ID_SIZE)
+        self.next_sequence = 0
+
+    def iv_for(self, session_id, sequence):
+        """
+        Derives the CBC IV by encrypting the unique (session id, sequence) nonce, so IVs never
+        repeat and are unpredictable without the key.
+        """
+        return self.iv_cipher.encrypt(ENVELOPE_HEADER.pack(session_id, sequence))
+
+    def tag(self, header, ciphertext):
+        """
+        HMAC-SHA256 over header || ciphertext, so neither can be edited undetected.
+        """
+        return hmac.new(self.mac_key, header + ciphertext, hashlib.sha256).digest()
+
+
+class SessionManager:
+    def __init__(self, local_id, key_manager, salt=b"random_salt", capacity=1024, replay_window=1024,
+                 max_windows=None, max_retired=None):
+        """
+        Multiplexes conversations with many peers over one transport. Derived cipher contexts
+        are cached per peer with LRU eviction; replay windows are kept separately so evicting
+        a context never reopens a replay gap. A context rebuilt after eviction starts a fresh
+        random session id, so its restarted sequence numbers cannot collide with old nonces.
+
+        A replay window is only created once a message on its session has decrypted, and
+        windows are themselves LRU-bounded by max_windows (default 4 * capacity). An evicted
+        window leaves just its highest sequence number in a second LRU of max_retired
+        entries (default 64 * capacity), and a session reopened from there rejects anything
+        at or below it. Only once a session drops out of both is its replay state lost.
+        """
+        self.local_id = local_id
+        self.key_manager = key_manager
+        self.key_derivation = KeyDerivation()
+        self.salt = salt
+        self.capacity = capacity
+        self.replay_window = replay_window
+        self.max_windows = max_windows or 4 * capacity
+        self.max_retired = max_retired or 64 * capacity
+        self.contexts = OrderedDict()
+        self.windows = OrderedDict()
+        self.retired = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "replays": 0, "window_evictions": 0}
+
+    def context(self, peer):
+        """
+        Returns the cached context for a peer, deriving it from the stored QKD key on a miss.
+        """
+        context = self.contexts.get(peer)
+        if context is not None:
+            self.contexts.move_to_end(peer)
+            self.stats["hits"] += 1
+            return context
+
+        raw_key = self.key_manager.retrieve_key(peer)
+        if raw_key is None:
+            raise KeyError(f"No key stored for peer {peer}.")
+        self.stats["misses"] += 1
+        context = PeerContext(peer, self.key_derivation.derive_key(raw_key, self.salt))
+        self.contexts[peer] = context
+        if len(self.contexts) > self.capacity:
+            self.contexts.popitem(last=False)
+            self.stats["evictions"] += 1
+        return context
+
+    def seal(self, peer, message):
+        """
+        Encrypts a message for a peer and returns the envelope: session id, sequence number,
+        ciphertext and an HMAC tag over everything before it (encrypt-then-MAC).
+        """
+        context = self.context(peer)
+        sequence = context.next_sequence
+        context.next_sequence += 1
+        iv = context.iv_for(context.session_id, sequence)
+        header = ENVELOPE_HEADER.pack(context.session_id, sequence)
+        ciphertext = context.sender.send_message(iv, message)
+        return header + ciphertext + context.tag(header, ciphertext)
+
+    def open(self, peer, envelope):
+        """
+        Decrypts an envelope from a peer, rejecting replayed or too-old sequence numbers.
+        The tag is verified before any replay state is read or changed, so a forged or
+        rewritten header can neither replay a message nor advance the window.
+        """
+        if len(envelope) < ENVELOPE_HEADER.size + MAC_SIZE:
+            raise SecurityException(f"Truncated envelope from {peer}.")
+        context = self.context(peer)
+        header = envelope[:ENVELOPE_HEADER.size]
+        ciphertext = envelope[ENVELOPE_HEADER.size:-MAC_SIZE]
+        if not hmac.compare_digest(context.tag(header, ciphertext), envelope[-MAC_SIZE:]):
+            raise SecurityException(f"Message authentication failed for envelope from {peer}.")
+
+        session_id, sequence = ENVELOPE_HEADER.unpack(header)
+        session = (peer, session_id)
+        window = self.windows.get(session)
+        if window is None and session in self.retired:
+            window = ReplayWindow.retired(self.replay_window, self.retired[session])
+        if window is not None and not window.check(sequence):
+            self.stats["replays"] += 1
+            raise SecurityException(f"Replayed or stale message {sequence} from {peer}.")
+
+        iv = context.iv_for(session_id, sequence)
+        message = context.receiver.receive_message(iv, ciphertext)
+        if window is None:
+            window = ReplayWindow(self.replay_window)
+        window.update(sequence)
+        self._keep_window(session, window)
+        return message
+
+    def _keep_window(self, session, window):
+        """
+        Stores a window as most recently used, retiring the least recently used one if full.
+        """
+        self.windows[session] = window
+        self.windows.move_to_end(session)
+        self.retired.pop(session, None)
+        if len(self.windows) > self.max_windows:
+            evicted, old = self.windows.popitem(last=False)
+            self.retired[evicted] = old.highest
+            self.stats["window_evictions"] += 1
+            if len(self.retired) > self.max_retired:
+                self.retired.popitem(last=False)
+
+    def send(self, peer, message):
+        """
+        Wraps a sealed message in a transport frame that names the sender.
+        """
+        local_id = str(self.local_id).encode("utf-8")
+        return struct.pack(">H", len(local_id)) + local_id + self.seal(peer, message)
+
+    def receive(self, frame):
+        """
+        Demultiplexes a transport frame and returns (sender, plaintext).
+        """
+        (id_length,) = struct.unpack_from(">H", frame)
+        peer = frame[2:2 + id_length].decode("utf-8")
+        return peer, self.open(peer, frame[2 + id_length:])
@@ -0,0 +1,200 @@
+import numpy as np
+
+MSG_BASES = 0x01
+MSG_INDICES = 0x02
+MSG_SYNDROME = 0x03
+MSG_HASH_SEED = 0x04
+MSG_SAMPLE_BITS = 0x05
+
+MESSAGE_NAMES = {
+    MSG_BASES: "bases",
+    MSG_INDICES: "indices",
+    MSG_SYNDROME: "syndrome",
+    MSG_HASH_SEED: "hash_seed",
+    MSG_SAMPLE_BITS: "sample_bits",
+}
+
+INDICES_DELTA = 0
+INDICES_RUNS = 1
+INDICES_BITMAP = 2
+
+
+def encode_varints(values):
+    """
+    LEB128-encodes an array of non-negative integers in one vectorized pass.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    bit_lengths = np.zeros(values.size, dtype=np.int64)
+    remaining = values.copy()
+    while remaining.any():
+        nonzero = remaining > 0
+        bit_lengths += nonzero
+        remaining >>= np.uint64(1)
+    num_bytes = np.maximum(1, (bit_lengths + 6) // 7)
+    offsets = np.concatenate([[0], np.cumsum(num_bytes)[:-1]])
+
+    out = np.zeros(int(num_bytes.sum()), dtype=np.uint8)
+    for k in range(int(num_bytes.max())):
+        mask = num_bytes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (num_bytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[mask] + k] = (chunk | more).astype(np.uint8)
+    return out
+
+
+def decode_varints(buffer, count):
+    """
+    Decodes `count` LEB128 integers from the start of a buffer.
+    Returns the values and the number of bytes consumed.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64), 0
+    ends = np.flatnonzero((data & 0x80) == 0)[:count]
+    if ends.size < count:
+        raise ValueError("Truncated varint sequence.")
+    consumed = int(ends[-1]) + 1
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    positions = np.arange(consumed) - np.repeat(starts, ends - starts + 1)
+    terms = (data[:consumed] & 0x7F).astype(np.uint64) << (7 * positions).astype(np.uint64)
+    return np.add.reduceat(terms, starts), consumed
+
+
+def _read_varint(view, offset):
+    value, consumed = decode_varints(view[offset:offset + 10], 1)
+    return int(value[0]), offset + consumed
+
+
+def _frame(message_type, *parts):
+    """
+    Assembles type byte, varint payload length and payload into one preallocated buffer,
+    copying each part in through a memoryview slice.
+    """
+    parts = [memoryview(part).cast("B") for part in parts]
+    payload_length = sum(part.nbytes for part in parts)
+    header = encode_varints([payload_length])
+    frame = bytearray(1 + header.size + payload_length)
+    view = memoryview(frame)
+    view[0] = message_type
+    view[1:1 + header.size] = header
+    offset = 1 + header.size
+    for part in parts:
+        view[offset:offset + part.nbytes] = part
+        offset += part.nbytes
+    return frame
+
+
+class WireCodec:
+    """
+    Binary encoding of the classical post-processing messages. Every frame is
+    type (1 byte) | payload length (varint) | payload.
+    """
+
+    def encode_bases(self, bases):
+        """
+        Bit-packs a basis choice per qubit ('Z'/'X' or 0/1).
+        """
+        bases = np.asarray(bases)
+        if bases.dtype.kind in "US":
+            bases = bases == "X"
+        bits = np.asarray(bases, dtype=np.uint8)
+        return _frame(MSG_BASES, encode_varints([bits.size]), np.packbits(bits))
+
+    def encode_indices(self, indices):
+        """
+        Encodes a sorted index set in the shortest of three forms: varint deltas,
+        (gap, run length) varint pairs for long consecutive runs, or a packed bitmap for
+        dense sets such as sifting masks.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size == 0:
+            return _frame(MSG_INDICES, bytes([INDICES_DELTA]), encode_varints([0]))
+        deltas = np.diff(indices, prepend=-1) - 1
+        run_starts = np.union1d([0], np.flatnonzero(deltas > 0))
+        run_lengths = np.diff(np.append(run_starts, indices.size))
+
+        candidates = [(INDICES_DELTA, encode_varints([indices.size]), encode_varints(deltas))]
+        if 2 * run_starts.size < indices.size:
+            pairs = np.column_stack([deltas[run_starts], run_lengths]).ravel()
+            candidates.append((INDICES_RUNS, encode_varints([run_starts.size]), encode_varints(pairs)))
+        span = int(indices[-1]) + 1
+        if (span + 7) // 8 < candidates[0][2].size:
+            bitmap = np.zeros(span, dtype=np.uint8)
+            bitmap[indices] = 1
+            candidates.append((INDICES_BITMAP, encode_varints([span]), np.packbits(bitmap)))
+        encoding, header, body = min(candidates, key=lambda candidate: candidate[1].size + candidate[2].size)
+        return _frame(MSG_INDICES, bytes([encoding]), header, body)
+
+    def encode_sample_bits(self, bits):
+        """
+        Bit-packs the key bits disclosed for error estimation.
+        """
+        bits = np.asarray(bits, dtype=np.uint8)
+        return _frame(MSG_SAMPLE_BITS, encode_varints([bits.size]), np.packbits(bits))
+
+    def encode_syndrome(self, block_id, syndrome_bits):
+        bits = np.asarray(syndrome_bits, dtype=np.uint8)
+        return _frame(MSG_SYNDROME, encode_varints([block_id, bits.size]), np.packbits(bits))
+
+    def encode_hash_seed(self, seed, output_bits):
+        """
+        Announces the privacy-amplification seed (e.g. the Toeplitz diagonal bits) and the
+        output key length.
+        """
+        seed = memoryview(seed).cast("B")
+        return _frame(MSG_HASH_SEED, encode_varints([seed.nbytes, output_bits]), seed)
+
+    def decode(self, buffer):
+        """
+        Decodes a stream of frames. Packed bit fields and seeds are returned as views into
+        the input buffer rather than copies.
+        """
+        view = memoryview(buffer).cast("B")
+        offset = 0
+        messages = []
+        while offset < view.nbytes:
+            message_type = view[offset]
+            length, offset = _read_varint(view, offset + 1)
+            payload = view[offset:offset + length]
+            if payload.nbytes < length:
+                raise ValueError("Truncated frame.")
+            offset += length
+            messages.append((MESSAGE_NAMES[message_type], self._decode_payload(message_type, payload)))
+        return messages
+
+    def _decode_payload(self, message_type, payload):
+        if message_type in (MSG_BASES, MSG_SAMPLE_BITS):
+            num_bits, offset = _read_varint(payload, 0)
+            return {"num_bits": num_bits, "packed": np.frombuffer(payload[offset:], dtype=np.uint8)}
+        if message_type == MSG_SYNDROME:
+            (block_id, num_bits), offset = decode_varints(payload, 2)
+            return {"block_id": int(block_id), "num_bits": int(num_bits),
+                    "packed": np.frombuffer(payload[offset:], dtype=np.uint8)}
+        if message_type == MSG_HASH_SEED:
+            (seed_length, output_bits), offset = decode_varints(payload, 2)
+            return {"seed": payload[offset:offset + int(seed_length)], "output_bits": int(output_bits)}
+        if message_type == MSG_INDICES:
+            encoding = payload[0]
+            count, offset = _read_varint(payload, 1)
+            if encoding == INDICES_RUNS:
+                pairs, _ = decode_varints(payload[offset:], 2 * count)
+                gaps, lengths = pairs[0::2].astype(np.int64), pairs[1::2].astype(np.int64)
+                preceding = np.cumsum(lengths) - lengths
+                starts = np.cumsum(gaps) + preceding
+                within = np.arange(lengths.sum()) - np.repeat(preceding, lengths)
+                return {"indices": np.repeat(starts, lengths) + within}
+            if encoding == INDICES_BITMAP:
+                bitmap = np.unpackbits(np.frombuffer(payload[offset:], dtype=np.uint8))[:count]
+                return {"indices": np.flatnonzero(bitmap)}
+            deltas, _ = decode_varints(payload[offset:], count)
+            return {"indices": np.cumsum(deltas.astype(np.int64) + 1) - 1}
+        raise ValueError(f"Unknown message type: {message_type}")
+
+
+def unpack_bits(message):
+    """
+    Expands the packed bit field of a decoded bases, sample-bits or syndrome message.
+    """
+    return np.unpackbits(message["packed"])[:message["num_bits"]]
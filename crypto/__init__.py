@@ -1,4 +1,5 @@
 from .encryption import Encryption
 from .key_derivation import KeyDerivation
+from .otp import OneTimePad
 
-__all__ = ['Encryption', 'KeyDerivation']
+__all__ = ['Encryption', 'KeyDerivation', 'OneTimePad']
@@ -1,23 +1,51 @@
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
+from concurrent.futures import ThreadPoolExecutor
 import os
+import struct
+
+MODE_PARALLEL_CTR = 0
+MODE_PARALLEL_GCM = 1
+PARALLEL_HEADER = struct.Struct(">8sBQI")  # nonce, mode, payload length, segment size
+TAG_SIZE = 16
+
+
+def segment_count(length, segment_size):
+    """
+    Number of segments a payload of length bytes is split into; an empty payload is one segment.
+    """
+    return max(1, -(-length // segment_size))
+
+
+def segment_bounds(index, length, segment_size):
+    start = index * segment_size
+    return start, min(start + segment_size, length)
+
 
 class Encryption:
-    def __init__(self, key):
+    def __init__(self, key, workers=None, segment_size=1 << 20):
         """
         Initializes the encryption class with the provided key.
         AES requires the key to be 16, 24, or 32 bytes long.
+        workers and segment_size configure the thread pool used by encrypt_parallel.
         """
         if len(key) not in [16, 24, 32]:
             raise ValueError("AES key must be either 16, 24, or 32 bytes long.")
+        if segment_size <= 0 or segment_size % AES.block_size:
+            raise ValueError("Segment size must be a positive multiple of the AES block size.")
         self.key = key
+        self.workers = workers or os.cpu_count()
+        self.segment_size = segment_size
+        self._executor = None
 
     def encrypt_message(self, iv, data):
         """
         Encrypts the plaintext using AES encryption in CBC mode.
         """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
         cipher = AES.new(self.key, AES.MODE_CBC, iv)
-        ciphertext = cipher.encrypt(pad(data.encode('utf-8'), AES.block_size))  # Pad the data to block size and encrypt
+        ciphertext = cipher.encrypt(pad(data, AES.block_size))  # Pad the data to block size and encrypt
         return ciphertext  # Return both IV and ciphertext
 
     def decrypt_message(self, iv, ciphertext):
@@ -28,6 +56,119 @@ class Encryption:
         plaintext = unpad(cipher.decrypt(ciphertext), AES.block_size)  # AES.block_size is 16
         return plaintext
 
+    def encrypt_parallel(self, data, authenticate=True):
+        """
+        Encrypts a large payload on a thread pool. The payload is split into segments of
+        segment_size bytes that are encrypted independently into one preallocated buffer:
+        with AES-CTR each segment starts at its own block counter, so the result equals a
+        single CTR pass; with AES-GCM (authenticate=True) each segment uses the nonce plus
+        its index and binds the whole header (nonce, mode, length, segment size) as associated
+        data, and the per-segment tags are collected into a trailer so that reordering,
+        truncation, header edits or tampering all fail. CTR output is unauthenticated.
+        Returns header || ciphertext || tags as a bytearray.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        data = memoryview(data).cast("B")
+        mode = MODE_PARALLEL_GCM if authenticate else MODE_PARALLEL_CTR
+        nonce = os.urandom(8)
+        count = segment_count(data.nbytes, self.segment_size)
+        tag_bytes = TAG_SIZE * count if authenticate else 0
+
+        message = bytearray(PARALLEL_HEADER.size + data.nbytes + tag_bytes)
+        PARALLEL_HEADER.pack_into(message, 0, nonce, mode, data.nbytes, self.segment_size)
+        header = bytes(message[:PARALLEL_HEADER.size])
+        view = memoryview(message)
+        body = view[PARALLEL_HEADER.size:PARALLEL_HEADER.size + data.nbytes]
+        tags = view[PARALLEL_HEADER.size + data.nbytes:]
+
+        def encrypt_segment(index):
+            start, end = segment_bounds(index, data.nbytes, self.segment_size)
+            cipher = self._segment_cipher(mode, nonce, index, header)
+            cipher.encrypt(data[start:end], output=body[start:end])
+            if mode == MODE_PARALLEL_GCM:
+                tags[index * TAG_SIZE:(index + 1) * TAG_SIZE] = cipher.digest()
+
+        self._map(encrypt_segment, count)
+        return message
+
+    def decrypt_parallel(self, message, allow_unauthenticated=False):
+        """
+        Reverses encrypt_parallel, decrypting segments on the thread pool into a preallocated
+        bytearray. Raises ValueError if any segment fails authentication. Unauthenticated CTR
+        messages are rejected unless allow_unauthenticated is set, so that an attacker cannot
+        downgrade a GCM message by rewriting its mode byte and dropping the tags.
+        """
+        message = memoryview(message).cast("B")
+        if message.nbytes < PARALLEL_HEADER.size:
+            raise ValueError("Truncated or oversized message.")
+        nonce, mode, length, segment_size = PARALLEL_HEADER.unpack_from(message)
+        if mode == MODE_PARALLEL_CTR and not allow_unauthenticated:
+            raise ValueError("Refusing to decrypt an unauthenticated (CTR) message.")
+        if mode not in (MODE_PARALLEL_CTR, MODE_PARALLEL_GCM):
+            raise ValueError(f"Unknown parallel encryption mode: {mode}")
+        if segment_size <= 0 or segment_size % AES.block_size:
+            raise ValueError("Invalid segment size in message header.")
+        # Sizes come from the unauthenticated header: check them before allocating anything
+        count = segment_count(length, segment_size)
+        tag_bytes = TAG_SIZE * count if mode == MODE_PARALLEL_GCM else 0
+        if message.nbytes != PARALLEL_HEADER.size + length + tag_bytes:
+            raise ValueError("Truncated or oversized message.")
+        header = bytes(message[:PARALLEL_HEADER.size])
+        body = message[PARALLEL_HEADER.size:PARALLEL_HEADER.size + length]
+        tags = message[PARALLEL_HEADER.size + length:]
+
+        plaintext = bytearray(length)
+        out = memoryview(plaintext)
+
+        def decrypt_segment(index):
+            start, end = segment_bounds(index, length, segment_size)
+            cipher = self._segment_cipher(mode, nonce, index, header, segment_size)
+            cipher.decrypt(body[start:end], output=out[start:end])
+            if mode == MODE_PARALLEL_GCM:
+                cipher.verify(tags[index * TAG_SIZE:(index + 1) * TAG_SIZE])
+
+        self._map(decrypt_segment, count)
+        return plaintext
+
+    def _segment_cipher(self, mode, nonce, index, header, segment_size=None):
+        if mode == MODE_PARALLEL_GCM:
+            cipher = AES.new(self.key, AES.MODE_GCM, nonce=nonce + index.to_bytes(4, "big"))
+            cipher.update(header)
+            return cipher
+        if mode != MODE_PARALLEL_CTR:
+            raise ValueError(f"Unknown parallel encryption mode: {mode}")
+        first_block = index * (segment_size or self.segment_size) // AES.block_size
+        return AES.new(self.key, AES.MODE_CTR, nonce=nonce, initial_value=first_block)
+
+    def _map(self, func, count):
+        """
+        Runs func over segment indices, inline for a single segment and on the shared
+        thread pool otherwise. pycryptodome releases the GIL inside the AES core.
+        """
+        if count == 1 or self.workers == 1:
+            for index in range(count):
+                func(index)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        for _ in self._executor.map(func, range(count)):
+            pass
+
+    def close(self):
+        """
+        Shuts down the thread pool used by encrypt_parallel and decrypt_parallel, if started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def generate_salt(self):
         """
         Generates a random salt for key derivation.
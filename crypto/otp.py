@@ -0,0 +1,105 @@
+import struct
+import time
+from collections import deque
+import numpy as np
+from qkd.qkd_protocol import SecurityException
+
+OFFSET_HEADER = struct.Struct(">Q")
+
+
+class OneTimePad:
+    def __init__(self, key_pool, rate_window=60.0, authenticator=None):
+        """
+        One-time-pad encryption with QKD key material. Every message consumes the next
+        contiguous segment of the pool; its offset in the key stream travels in an 8-byte
+        header so the receiver can find the same segment. Material is never handed out twice.
+
+        A bare one-time pad is confidential but not authenticated: flipping a ciphertext bit
+        flips the same plaintext bit. With a comms.authentication.Authenticator, each
+        message also carries a Wegman-Carter tag over header || ciphertext, whose one-time
+        pad is the tag_size bytes of the pool following the message's own segment, so
+        tags stay aligned with offsets even when messages are skipped. decrypt_message
+        then rejects modified messages before consuming any pad.
+        """
+        self.key_pool = key_pool
+        self.authenticator = authenticator
+        self.tag_size = authenticator.tag_size if authenticator is not None else 0
+        self.rate_window = rate_window
+        self.usage_log = deque()
+
+    def _record(self, num_bytes):
+        now = time.monotonic()
+        self.usage_log.append((now, num_bytes))
+        while self.usage_log and now - self.usage_log[0][0] > self.rate_window:
+            self.usage_log.popleft()
+
+    def _xor_into(self, out, data, pad):
+        np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), np.frombuffer(pad, dtype=np.uint8),
+                       out=np.frombuffer(out, dtype=np.uint8))
+
+    def encrypt_message(self, data):
+        """
+        XORs the payload with fresh pad and returns offset header || ciphertext, followed by
+        the authentication tag when an authenticator is configured.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        offset = self.key_pool.consumed
+        pad = self.key_pool.take(len(data) + self.tag_size)
+        message = bytearray(OFFSET_HEADER.size + len(data))
+        OFFSET_HEADER.pack_into(message, 0, offset)
+        self._xor_into(memoryview(message)[OFFSET_HEADER.size:], data, pad[:len(data)])
+        if self.authenticator is not None:
+            message += self.authenticator.tag_batch([bytes(message)], pad[len(data):])[0]
+        self._record(len(data))
+        return message
+
+    def decrypt_message(self, message):
+        """
+        Recovers the plaintext. Refuses messages whose pad segment has already been used and
+        discards any skipped material when a message arrives ahead of the local offset.
+        The pool is left untouched if the pad is not available yet or, with an
+        authenticator, if the tag does not verify.
+        """
+        if len(message) < OFFSET_HEADER.size + self.tag_size:
+            raise ValueError("Message is shorter than its header and tag.")
+        (offset,) = OFFSET_HEADER.unpack_from(message)
+        consumed = self.key_pool.consumed
+        if offset < consumed:
+            raise SecurityException(f"Pad at offset {offset} has already been used.")
+        body = memoryview(message)[:len(message) - self.tag_size]
+        ciphertext = body[OFFSET_HEADER.size:]
+        gap = offset - consumed
+        pad = self.key_pool.peek(ciphertext.nbytes + self.tag_size, gap)
+        if self.authenticator is not None:
+            tag = bytes(memoryview(message)[len(message) - self.tag_size:])
+            if not self.authenticator.verify_batch([bytes(body)], [tag], pad[ciphertext.nbytes:])[0]:
+                raise SecurityException(f"Message at offset {offset} failed authentication.")
+        self.key_pool.skip(gap + ciphertext.nbytes + self.tag_size)
+        plaintext = bytearray(ciphertext.nbytes)
+        self._xor_into(plaintext, ciphertext, pad[:ciphertext.nbytes])
+        self._record(ciphertext.nbytes)
+        return plaintext
+
+    def consumption_rate(self):
+        """
+        Bytes of pad consumed per second over the recent rate window.
+        """
+        if len(self.usage_log) < 2:
+            return 0.0
+        span = self.usage_log[-1][0] - self.usage_log[0][0]
+        return sum(num_bytes for _, num_bytes in self.usage_log) / span if span > 0 else 0.0
+
+    def accounting(self):
+        """
+        Reports pool usage and how long the remaining pad lasts at the current message rate.
+        """
+        rate = self.consumption_rate()
+        available = self.key_pool.available()
+        return {
+            "available_bytes": available,
+            "consumed_bytes": self.key_pool.consumed,
+            "produced_bytes": self.key_pool.produced,
+            "consumption_bps": 8 * rate,
+            "seconds_remaining": available / rate if rate else float("inf"),
+        }
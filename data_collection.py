@@ -1,111 +1,104 @@
-import time
-import random
+import argparse
 import logging
-from scipy.stats import entropy
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
-from qkd.qkd_protocol import QKDProtocol, SecurityException
-from crypto.encryption import Encryption
-from crypto.key_derivation import KeyDerivation
-import os
+from analysis.cache import ResultCache
+from analysis.collection import COLLECTORS, CSVSink, CollectionJob, JSONLSink, sweep
+from analysis.distributed import Coordinator, start_workers
 
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Function to measure execution time
-def measure_time(func, *args, **kwargs):
-    start_time = time.time()
-    result = func(*args, **kwargs)
-    end_time = time.time()
-    return result, end_time - start_time
 
 # Data collection script
-def collect_data():
-    results = {}
-
-    # Step 1: QKD Key Generation Time
-    qkd_protocol = QKDProtocol()
-    raw_key, key_time = measure_time(qkd_protocol.run_protocol)
-    results['qkd_key_time'] = key_time
-    logging.info(f"QKD key generation time: {key_time:.6f} seconds")
-
-    # Step 2: Key Entropy
-    raw_key_str = ''.join(str(bit) for bit in raw_key)
-    key_probs = [raw_key_str.count('0') / len(raw_key), raw_key_str.count('0') / len(raw_key)]
-    key_entropy = entropy(key_probs, base=2)
-    results['qkd_key_entropy'] = key_entropy
-    logging.info(f"QKD key entropy: {key_entropy:.6f} bits")
-
-    # Step 4: Encryption Time
-    aes_key = os.urandom(32)
-    encryption = Encryption(aes_key)
-    data = "This is a test message"  # Test data
-    iv = os.urandom(AES.block_size)
-    ciphertext = encryption.encrypt_message(iv, data)  # Get both iv and ciphertext
-    _, encryption_time = measure_time(lambda: encryption.encrypt_message(iv, data))
-    results['encryption_time'] = encryption_time
-    logging.info(f"Encryption time: {encryption_time:.6f} seconds")
-
-    # Step 5: Decryption Time
-    # Pass both iv and ciphertext to decrypt_message
-    _, decryption_time = measure_time(lambda: encryption.decrypt_message(iv, ciphertext))  # Correct call
-    results['decryption_time'] = decryption_time
-    logging.info(f"Decryption time: {decryption_time:.6f} seconds")
-
-    # Step 5: Bandwidth Overhead Simulation
-    qubit_count = len(raw_key) * 2  # Assuming each bit requires 2 qubits for transmission
-    reconciliation_data_size = len(raw_key) * 4  # Approximate reconciliation data size
-    results['qubit_count'] = qubit_count
-    results['reconciliation_data_size'] = reconciliation_data_size
-    logging.info(f"Qubits transmitted: {qubit_count}")
-    logging.info(f"Reconciliation data size: {reconciliation_data_size} bytes")
-
-    # Step 6: Error Rate Simulation
-    noise_level = 0.1  # Simulate 10% noise in the channel
-    noisy_key = [bit if random.random() > noise_level else 1 - bit for bit in raw_key]
-    error_count = sum(1 for a, b in zip(raw_key, noisy_key) if a != b)
-    error_rate = error_count / len(raw_key)
-    results['error_rate'] = error_rate
-    logging.info(f"Error rate with {noise_level * 100}% noise: {error_rate:.6f}")
-
-    # Step 7: Eavesdropping Detection Test
-    try:
-        qkd_protocol.simulate_eavesdropping(noise_level)  # Assuming this simulates and detects snooping
-        results['eavesdropping_detected'] = True
-        logging.info("Eavesdropping successfully detected.")
-    except SecurityException:
-        results['eavesdropping_detected'] = False
-        logging.info("No eavesdropping detected.")
-
-    # Step 8: AES Encryption Comparison
-    aes_cipher = AES.new(aes_key, AES.MODE_CBC)
-    iv = aes_cipher.iv  # Get the IV used for encryption
-    padded_data = pad(data.encode('utf-8'), AES.block_size)
-
-    # Measure AES Encryption Time
-    _, aes_encryption_time = measure_time(aes_cipher.encrypt, padded_data)
-    results['aes_encryption_time'] = aes_encryption_time
-    logging.info(f"AES encryption time: {aes_encryption_time:.6f} seconds")
-
-    # Now use the same IV for decryption
-    aes_ciphertext = aes_cipher.encrypt(padded_data)
-
-    # Re-initialize AES cipher for decryption using the same IV
-    aes_cipher_decrypt = AES.new(aes_key, AES.MODE_CBC, iv)
-
-    # Measure AES Decryption Time
-    _, aes_decryption_time = measure_time(aes_cipher_decrypt.decrypt, aes_ciphertext)
-    results['aes_decryption_time'] = aes_decryption_time
-    logging.info(f"AES decryption time: {aes_decryption_time:.6f} seconds")
-
-    # Final results
+def collect_data(config=None, seed=0, cache=None):
+    """
+    Runs every collector once and returns the collected metrics, reusing a cached run
+    when a ResultCache is given.
+    """
+    job = CollectionJob(list(COLLECTORS), sweep(config), seed=seed, cache=cache)
+    results = next(job.rows())
     logging.info("Data collection complete.")
-    for metric, value in results.items():
-        print(f"{metric}: {value}")
-
     return results
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(description="Collect QKD and encryption performance metrics.")
+    parser.add_argument("--collectors", nargs="+", default=list(COLLECTORS), choices=list(COLLECTORS))
+    parser.add_argument("--qubits", type=int, nargs="+", help="Qubit counts to sweep.")
+    parser.add_argument("--qubits-range", type=int, nargs=3, metavar=("START", "STOP", "STEP"),
+                        help="Sweep qubit counts over range(START, STOP, STEP).")
+    parser.add_argument("--threshold", type=float, nargs="+", help="Error thresholds to sweep.")
+    parser.add_argument("--message-size", type=int, nargs="+", help="Message sizes in bytes to sweep.")
+    parser.add_argument("--noise-level", type=float, nargs="+", help="Simulated noise levels to sweep.")
+    parser.add_argument("--repetitions", type=int, default=1, help="Runs per configuration.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--batch-size", type=int, default=16, help="Runs per worker batch.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed; run i uses seed + i.")
+    parser.add_argument("--csv", help="Write rows to this CSV file.")
+    parser.add_argument("--jsonl", help="Write rows to this JSON Lines file.")
+    parser.add_argument("--cache", metavar="DIR", help="Reuse and store results in this cache directory.")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MB", help="Cache size limit in MB.")
+    parser.add_argument("--cache-keys", action="store_true", help="Store QKD key material in the cache.")
+    parser.add_argument("--coordinate", metavar="HOST:PORT",
+                        help="Serve the sweep to remote workers instead of running it locally.")
+    parser.add_argument("--lease-timeout", type=float, default=120.0,
+                        help="Seconds before a unit held by an unresponsive worker is reassigned.")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Worker processes to start on this host when coordinating.")
+    parser.add_argument("--worker", metavar="URL",
+                        help="Run --workers worker processes against the coordinator at URL.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        for process in start_workers(args.worker.rstrip("/"), args.workers):
+            process.join()
+        return
+
+    ranges = {}
+    if args.qubits_range:
+        ranges["num_qubits"] = range(*args.qubits_range)
+    elif args.qubits:
+        ranges["num_qubits"] = args.qubits
+    if args.threshold:
+        ranges["error_threshold"] = args.threshold
+    if args.message_size:
+        ranges["message_size"] = args.message_size
+    if args.noise_level:
+        ranges["noise_level"] = args.noise_level
+
+    sinks = []
+    if args.csv:
+        sinks.append(CSVSink(args.csv))
+    if args.jsonl:
+        sinks.append(JSONLSink(args.jsonl))
+
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, max_bytes=args.cache_size * 2 ** 20, store_keys=args.cache_keys)
+
+    job = CollectionJob(args.collectors, sweep(**ranges), repetitions=args.repetitions, sinks=sinks,
+                        workers=args.workers, batch_size=args.batch_size, seed=args.seed, cache=cache)
+    if args.coordinate:
+        host, _, port = args.coordinate.rpartition(":")
+        with Coordinator(job, host or "127.0.0.1", int(port), lease_timeout=args.lease_timeout) as coordinator:
+            start_workers(coordinator.url, args.local_workers)
+            write_rows(job, coordinator.rows(), sinks)
+            logging.info(f"Coordinator: {coordinator.stats}")
+        return
+    write_rows(job, job.rows(), sinks)
+
+
+def write_rows(job, rows, sinks):
+    if not sinks:
+        for row in rows:
+            print(row)
+        return
+    count = job.run(rows)
+    logging.info(f"Wrote {count} rows.")
+
+
 if __name__ == "__main__":
-    data = collect_data()
+    main()
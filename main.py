@@ -1,64 +1,314 @@
+import argparse
+import json
 import logging
+import os
+import sys
+import time
+from contextlib import nullcontext
 from qkd.qkd_protocol import QKDProtocol, SecurityException
 from qkd.key_management import KeyManagement
+from qkd.audit_log import AuditLog
 from Crypto.Cipher import AES
 from crypto.encryption import Encryption
 from crypto.key_derivation import KeyDerivation
 from comms.sender import Sender
 from comms.receiver import Receiver
-from comms.channel import Channel
+from utils.config import Config
 from utils.logger import setup_logger
-import os
+from utils.metrics import Metrics
+from utils.memory import MemoryProfiler
+from analysis.loadtest import LoadGenerator, MessagingPipeline, find_max_throughput
 
-def main():
-    # Step 1: Set up logging
-    setup_logger()
-    logging.info("Starting the Quantum Encrypted Messaging System.")
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_SECURITY = 3
+EXIT_NO_KEY = 4
 
-    # Step 2: Initialize QKD and Key Management
-    num_qubits = 100
-    error_threshold = 0.11
-    qkd = QKDProtocol(num_qubits=num_qubits, error_threshold=error_threshold)
-    key_manager = KeyManagement()
-    key_derivation = KeyDerivation()
+DEFAULT_STORE = "qkd_keys.json"
+SALT_SIZE = 16
 
-    # Step 3: Perform Quantum Key Distribution
-    try:
-        logging.info("Performing Quantum Key Distribution...")
-        raw_key = qkd.run_protocol()
-        logging.info(f"Raw key generated: {raw_key}")
-    except SecurityException as e:
-        logging.error(f"Snooping detected! Aborting communication: {e}")
-        return
 
-    # Step 4: Derive the encryption key
-    channel = Channel()  # Create an instance of the Channel class
-    salt = channel.simulate_classical_channel(b"random_salt")
-    encryption_key = key_derivation.derive_key(raw_key, salt)
-    logging.info(f"Derived encryption key: {encryption_key.hex()}")
+def run_qkd_session(qkd, retries=0):
+    """
+    Runs the QKD protocol, retrying aborted sessions up to the given number of times.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return qkd.run_protocol()
+        except SecurityException as e:
+            logging.warning(f"QKD session aborted (attempt {attempt + 1}/{retries + 1}): {e}")
+    raise SecurityException("QKD failed on every attempt; the channel may be compromised.")
 
 
-    # Step 5: Initialize Sender and Receiver
-    encryption_module = Encryption(encryption_key)
-    sender = Sender(encryption_module)
-    receiver = Receiver(encryption_module)
+def build_protocol(args, metrics=None):
+    """
+    Creates a QKDProtocol from command-line options, falling back to the configured defaults.
+    """
+    settings = Config().get_config()
+    num_qubits = args.qubits if args.qubits is not None else settings["num_qubits"]
+    error_threshold = args.threshold if args.threshold is not None else settings["error_threshold"]
+    return QKDProtocol(num_qubits=num_qubits, error_threshold=error_threshold, metrics=metrics)
 
-    # Step 6: Simulate a Secure Message Transmission
-    iv = os.urandom(AES.block_size)  # Generate a random IV for CBC mode
-    message = input("Enter the message to send securely: ")
-    encrypted_message = sender.send_message(iv, message)
-    logging.info(f"Encrypted message: {encrypted_message}")
 
-    decrypted_message = receiver.receive_message(iv, encrypted_message)
-    logging.info(f"Decrypted message: {decrypted_message}")
+def load_store(path, audit_log=None):
+    """
+    Opens the on-disk key store, recording key events to the audit log if one is given.
+    """
+    key_manager = KeyManagement(audit_log)
+    key_manager.load(path)
+    return key_manager
 
-    # Step 7: Display results
-    print("\n--- Secure Communication Results ---")
-    print(f"Original Message: {message}")
-    print(f"Encrypted Message: {encrypted_message}")
-    print(f"Decrypted Message: {decrypted_message}")
 
-if __name__ == "__main__":
-    main()
+def open_input(path):
+    return nullcontext(sys.stdin.buffer) if path == "-" else open(path, "rb")
+
+
+def open_output(path):
+    return nullcontext(sys.stdout.buffer) if path == "-" else open(path, "wb")
+
+
+def encryption_for(args, salt):
+    """
+    Derives the AES key for a participant's stored QKD key and wraps it in an Encryption module.
+    """
+    raw_key = load_store(args.store, args.audit).retrieve_key(args.participant)
+    if raw_key is None:
+        return None
+    return Encryption(KeyDerivation().derive_key(raw_key, salt))
+
+
+def cmd_keygen(args):
+    """
+    Generates a fresh QKD key for each participant and saves it to the store.
+    """
+    key_manager = load_store(args.store, args.audit)
+    qkd = build_protocol(args)
+    for participant in args.participants:
+        key_manager.store_key(run_qkd_session(qkd, args.retries), participant)
+        logging.info(f"Stored QKD key for {participant}.")
+    key_manager.save(args.store)
+    return EXIT_OK
+
+
+def cmd_encrypt(args):
+    """
+    Encrypts a whole stream, or one message per input line in batch mode.
+    Output is salt || IV || ciphertext, or in batch mode a salt line followed by one hex line per message.
+    With --parallel the stream is encrypted with multi-threaded segmented AES-GCM instead of CBC.
+    """
+    salt = os.urandom(SALT_SIZE)
+    encryption = encryption_for(args, salt)
+    if encryption is None:
+        logging.error(f"No key stored for {args.participant}.")
+        return EXIT_NO_KEY
+    sender = Sender(encryption)
+
+    with open_input(args.input) as src, open_output(args.output) as dst:
+        if args.batch:
+            dst.write(salt.hex().encode() + b"\n")
+            for line in src:
+                iv = os.urandom(AES.block_size)
+                ciphertext = sender.send_message(iv, line.rstrip(b"\r\n"))
+                dst.write((iv + ciphertext).hex().encode() + b"\n")
+        elif args.parallel:
+            dst.write(salt)
+            with encryption:
+                dst.write(encryption.encrypt_parallel(src.read()))
+        else:
+            iv = os.urandom(AES.block_size)
+            dst.write(salt + iv + sender.send_message(iv, src.read()))
+    return EXIT_OK
+
+
+def cmd_decrypt(args):
+    """
+    Reverses cmd_encrypt for the same participant.
+    """
+    with open_input(args.input) as src, open_output(args.output) as dst:
+        if args.batch:
+            salt = bytes.fromhex(src.readline().decode().strip())
+        else:
+            salt = src.read(SALT_SIZE)
+        encryption = encryption_for(args, salt)
+        if encryption is None:
+            logging.error(f"No key stored for {args.participant}.")
+            return EXIT_NO_KEY
+        receiver = Receiver(encryption)
+
+        if args.batch:
+            for line in src:
+                blob = bytes.fromhex(line.decode().strip())
+                iv, ciphertext = blob[:AES.block_size], blob[AES.block_size:]
+                dst.write(receiver.receive_message(iv, ciphertext) + b"\n")
+        elif args.parallel:
+            with encryption:
+                dst.write(encryption.decrypt_parallel(src.read()))
+        else:
+            iv = src.read(AES.block_size)
+            dst.write(receiver.receive_message(iv, src.read()))
+    return EXIT_OK
+
+
+def cmd_loadtest(args):
+    """
+    Drives messages through QKD, key derivation, Sender and Receiver in one process,
+    rotating the QKD key every --messages-per-key messages. With --rate or --find-max the
+    load is open-loop instead, see cmd_open_loop.
+    """
+    if args.rate or args.find_max:
+        return cmd_open_loop(args)
+    metrics = Metrics()
+    pipeline = MessagingPipeline(build_protocol(args, metrics), args.messages_per_key, args.retries, metrics)
+
+    start_time = time.perf_counter()
+    for _ in range(args.messages):
+        pipeline.round_trip(os.urandom(args.size))
+    sent = args.messages
+    elapsed = time.perf_counter() - start_time
+
+    report = {
+        "messages": sent,
+        "message_size": args.size,
+        "messages_per_key": args.messages_per_key,
+        "elapsed_seconds": elapsed,
+        "messages_per_second": sent / elapsed if elapsed else 0.0,
+        "bytes_per_second": sent * args.size / elapsed if elapsed else 0.0,
+        "metrics": metrics.snapshot(),
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+    return EXIT_OK
+
 
+def cmd_open_loop(args):
+    """
+    Offers Poisson arrivals at --rate to a thread pool running the pipeline and reports
+    latency percentiles, or with --find-max searches for the highest rate that keeps p99
+    latency under --slo-p99.
+    """
+    def make_generator(rate):
+        pipeline = MessagingPipeline(build_protocol(args), args.messages_per_key, args.retries)
+        return LoadGenerator(pipeline, rate, args.duration, args.size_dist or f"fixed:{args.size}",
+                             workers=args.workers)
 
+    if args.find_max:
+        best_rate, reports = find_max_throughput(make_generator, args.rate or 100.0, args.slo_p99)
+        report = {"max_sustainable_rate": best_rate, "slo_p99": args.slo_p99, "steps": reports}
+    else:
+        report = make_generator(args.rate).run()
+    print(json.dumps(report, indent=2, sort_keys=True))
+    return EXIT_OK
+
+
+def cmd_metrics(args):
+    """
+    Dumps key-store statistics and per-stage protocol timings as JSON.
+    With --memory, per-stage peak and retained allocations are included as memory.* gauges.
+    """
+    metrics = Metrics()
+    key_manager = load_store(args.store)
+    metrics.set_gauge("store.participants", len(key_manager.key_store))
+
+    qkd = build_protocol(args, metrics)
+    profiler = None
+    if args.memory:
+        profiler = qkd.memory_profiler = MemoryProfiler(metrics)
+    for _ in range(args.runs):
+        try:
+            with profiler.stage("qkd.run_protocol", qkd.num_qubits) if profiler else nullcontext():
+                qkd.run_protocol()
+        except SecurityException:
+            pass
+    if profiler is not None:
+        profiler.stop()
+    print(metrics.to_json())
+    return EXIT_OK
+
+
+def positive_int(value):
+    """
+    argparse type for counts that must be at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def add_protocol_options(parser):
+    parser.add_argument("--qubits", type=int, help="Qubits per QKD session (default from Config).")
+    parser.add_argument("--threshold", type=float, help="QBER abort threshold (default from Config).")
+    parser.add_argument("--retries", type=int, default=0, help="Retries for aborted QKD sessions.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Quantum Encrypted Messaging System.")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Path of the JSON key store.")
+    parser.add_argument("--audit-log", help="Append key store, retrieve and delete events to this audit log.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    keygen = subparsers.add_parser("keygen", help="Run QKD and store a key per participant.")
+    keygen.add_argument("participants", nargs="+")
+    add_protocol_options(keygen)
+    keygen.set_defaults(func=cmd_keygen)
+
+    for name, func, summary in (("encrypt", cmd_encrypt, "Encrypt a file or stdin."),
+                                ("decrypt", cmd_decrypt, "Decrypt a file or stdin.")):
+        sub = subparsers.add_parser(name, help=summary)
+        sub.add_argument("participant")
+        sub.add_argument("-i", "--input", default="-", help="Input file (default stdin).")
+        sub.add_argument("-o", "--output", default="-", help="Output file (default stdout).")
+        framing = sub.add_mutually_exclusive_group()
+        framing.add_argument("--batch", action="store_true", help="Treat each input line as a separate message.")
+        framing.add_argument("--parallel", action="store_true",
+                         help="Use multi-threaded segmented AES-GCM for large inputs.")
+        sub.set_defaults(func=func)
+
+    loadtest = subparsers.add_parser("loadtest", help="Run a loopback load test of the full pipeline.")
+    loadtest.add_argument("--messages", type=int, default=1000)
+    loadtest.add_argument("--size", type=int, default=256, help="Message size in bytes.")
+    loadtest.add_argument("--messages-per-key", type=positive_int, default=100)
+    loadtest.add_argument("--rate", type=float, help="Open-loop arrival rate in messages per second.")
+    loadtest.add_argument("--duration", type=float, default=10.0, help="Open-loop run time in seconds.")
+    loadtest.add_argument("--size-dist", help="Message sizes, e.g. fixed:256, uniform:64:4096, "
+                                              "lognormal:512:1.0 or choice:64,1024.")
+    loadtest.add_argument("--workers", type=int, default=8, help="Open-loop worker threads.")
+    loadtest.add_argument("--find-max", action="store_true", help="Search for the max sustainable rate.")
+    loadtest.add_argument("--slo-p99", type=float, default=0.25, help="p99 latency target in seconds.")
+    add_protocol_options(loadtest)
+    loadtest.set_defaults(func=cmd_loadtest)
+
+    metrics = subparsers.add_parser("metrics", help="Dump key-store and protocol stage metrics.")
+    metrics.add_argument("--runs", type=int, default=1, help="Protocol runs to time.")
+    metrics.add_argument("--memory", action="store_true", help="Also track per-stage memory with tracemalloc.")
+    add_protocol_options(metrics)
+    metrics.set_defaults(func=cmd_metrics)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help(sys.stderr)
+        return EXIT_USAGE
+    setup_logger(logging.DEBUG if args.verbose else logging.WARNING)
+
+    try:
+        args.audit = AuditLog(args.audit_log) if args.audit_log else None
+        try:
+            return args.func(args)
+        finally:
+            if args.audit is not None:
+                args.audit.close()
+    except SecurityException as e:
+        logging.error(f"Snooping detected! Aborting communication: {e}")
+        return EXIT_SECURITY
+    except (OSError, ValueError) as e:
+        logging.error(f"{args.command} failed: {e}")
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
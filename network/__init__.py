@@ -0,0 +1,5 @@
+from .topology import Link, Network
+from .relay import xor_relay
+from .simulator import NetworkSimulator
+
+__all__ = ['Link', 'Network', 'xor_relay', 'NetworkSimulator']
@@ -0,0 +1,33 @@
+import numpy as np
+from qkd.qkd_protocol import SecurityException
+from qkd.key_management import KeyExhaustedError
+
+
+def xor_relay(network, path, num_bytes):
+    """
+    Establishes a num_bytes end-to-end key along a path of trusted nodes.
+
+    The key is the material of the first link. Each intermediate node publishes the XOR of
+    its two link keys, and the destination recovers the key by XOR-ing its own link key with
+    every announcement. One key's worth of material is consumed on every link. The key is
+    stored in the KeyManagement of both endpoints and returned with the announcements.
+    Raises ValueError for a path of fewer than two nodes.
+    """
+    if len(path) < 2:
+        raise ValueError(f"A relay path needs at least two nodes, got {list(path)}.")
+    links = [network.link(node_a, node_b) for node_a, node_b in zip(path, path[1:])]
+    short = [link.nodes for link in links if link.pool.available() < num_bytes]
+    if short:
+        raise KeyExhaustedError(f"Links {short} cannot supply {num_bytes} bytes of key.")
+
+    link_keys = np.stack([np.frombuffer(link.pool.take(num_bytes), dtype=np.uint8) for link in links])
+    announcements = link_keys[:-1] ^ link_keys[1:]
+    recovered = link_keys[-1] ^ np.bitwise_xor.reduce(announcements, axis=0) if len(links) > 1 else link_keys[-1]
+    if not np.array_equal(recovered, link_keys[0]):
+        raise SecurityException("Relayed key does not match at the destination.")
+
+    key = link_keys[0].tobytes()
+    source, target = path[0], path[-1]
+    network.nodes[source].store_key(key.hex(), target)
+    network.nodes[target].store_key(key.hex(), source)
+    return key, [announcement.tobytes() for announcement in announcements]
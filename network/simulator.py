@@ -0,0 +1,82 @@
+import random
+from qkd.key_management import KeyExhaustedError
+from network.relay import xor_relay
+from utils.scheduler import Scheduler
+
+
+class NetworkSimulator:
+    def __init__(self, network, demands, refill_interval=1.0, seed=None):
+        """
+        Event-driven simulation of key supply and demand across a trusted-node network.
+
+        demands is a list of (source, target, requests_per_second, bytes_per_request).
+        Links add key_rate_bps * refill_interval bits to their pools every interval; requests
+        arrive as Poisson processes and are relayed along the shortest path whose links all
+        hold enough key, or counted as blocked. Raises ValueError for a demand whose source
+        and target are the same node, since there is no link to relay over.
+        """
+        loops = [(source, target) for source, target, *_ in demands if source == target]
+        if loops:
+            raise ValueError(f"Demands must connect two different nodes: {loops}")
+        self.network = network
+        self.demands = demands
+        self.refill_interval = refill_interval
+        self.rng = random.Random(seed)
+        self.scheduler = Scheduler()
+        self.started = False
+        self.stats = [{"served": 0, "blocked": 0, "bytes": 0, "hops": 0} for _ in demands]
+
+    @property
+    def now(self):
+        return self.scheduler.now
+
+    def refill(self, index):
+        link = self.network.links[index]
+        link.generate(int(link.key_rate_bps * self.refill_interval) // 8)
+        self.scheduler.schedule(self.refill_interval, self.refill, index)
+
+    def request(self, index):
+        source, target, rate, num_bytes = self.demands[index]
+        stats = self.stats[index]
+        path = self.network.shortest_path(source, target, min_bytes=num_bytes)
+        if path is None:
+            stats["blocked"] += 1
+        else:
+            try:
+                xor_relay(self.network, path, num_bytes)
+                stats["served"] += 1
+                stats["bytes"] += num_bytes
+                stats["hops"] += len(path) - 1
+            except KeyExhaustedError:
+                stats["blocked"] += 1
+        self.scheduler.schedule(self.rng.expovariate(rate), self.request, index)
+
+    def run(self, until):
+        """
+        Processes events up to the given simulated time and returns a summary report.
+        """
+        if not self.started:
+            self.started = True
+            for index in range(len(self.network.links)):
+                self.scheduler.schedule(self.rng.uniform(0, self.refill_interval), self.refill, index)
+            for index, demand in enumerate(self.demands):
+                self.scheduler.schedule(self.rng.expovariate(demand[2]), self.request, index)
+        self.scheduler.run(until=until)
+        return self.report()
+
+    def report(self):
+        served = sum(stats["served"] for stats in self.stats)
+        blocked = sum(stats["blocked"] for stats in self.stats)
+        delivered = sum(stats["bytes"] for stats in self.stats)
+        produced = sum(link.pool.produced for link in self.network.links)
+        consumed = sum(link.pool.consumed for link in self.network.links)
+        return {
+            "time": self.now,
+            "served": served,
+            "blocked": blocked,
+            "blocking_probability": blocked / (served + blocked) if served + blocked else 0.0,
+            "delivered_bps": 8 * delivered / self.now if self.now else 0.0,
+            "link_utilization": consumed / produced if produced else 0.0,
+            "mean_hops": sum(stats["hops"] for stats in self.stats) / served if served else 0.0,
+            "demands": [dict(stats, source=d[0], target=d[1]) for stats, d in zip(self.stats, self.demands)],
+        }
@@ -0,0 +1,228 @@
+import heapq
+import os
+import random
+from collections import deque
+from qkd.qkd_protocol import QKDProtocol, SecurityException
+from qkd.key_management import KeyManagement, KeyPool
+
+KEY_BYTES_PER_RUN = 32  # QKDProtocol.run_protocol returns a SHA3-256 digest
+
+
+class Link:
+    def __init__(self, node_a, node_b, key_rate_bps, num_qubits=256, error_threshold=0.11,
+                 pool_capacity=2 ** 20, material="random"):
+        """
+        A point-to-point QKD link with its own protocol instance and key pool.
+        material="protocol" fills the pool by running QKDProtocol; "random" draws bytes from
+        os.urandom at the same modelled rate, which is what large planning runs use.
+        """
+        if material not in ("protocol", "random"):
+            raise ValueError(f"Unknown key material source: {material}")
+        self.nodes = (node_a, node_b)
+        self.key_rate_bps = key_rate_bps
+        self.protocol = QKDProtocol(num_qubits=num_qubits, error_threshold=error_threshold)
+        self.pool = KeyPool(pool_capacity)
+        self.material = material
+        self.aborts = 0
+
+    def other(self, node):
+        return self.nodes[1] if node == self.nodes[0] else self.nodes[0]
+
+    def generate(self, num_bytes):
+        """
+        Adds num_bytes of fresh key material to the pool and returns the bytes accepted.
+        Aborted protocol runs are counted and contribute nothing.
+        """
+        if self.material == "random":
+            return self.pool.add(os.urandom(num_bytes))
+        material = bytearray()
+        for _ in range(-(-num_bytes // KEY_BYTES_PER_RUN)):
+            try:
+                material += bytes.fromhex(self.protocol.run_protocol())
+            except SecurityException:
+                self.aborts += 1
+        return self.pool.add(material[:num_bytes])
+
+
+class Network:
+    def __init__(self):
+        """
+        Trusted-node QKD network: every node keeps its end-to-end keys in a KeyManagement
+        store and every link keeps the raw key material it has generated in a KeyPool.
+        """
+        self.nodes = {}
+        self.adjacency = {}
+        self.links = []
+
+    def add_node(self, name):
+        if name not in self.nodes:
+            self.nodes[name] = KeyManagement()
+            self.adjacency[name] = {}
+        return self.nodes[name]
+
+    def add_link(self, node_a, node_b, key_rate_bps, **link_options):
+        self.add_node(node_a)
+        self.add_node(node_b)
+        link = Link(node_a, node_b, key_rate_bps, **link_options)
+        self.adjacency[node_a][node_b] = link
+        self.adjacency[node_b][node_a] = link
+        self.links.append(link)
+        return link
+
+    def link(self, node_a, node_b):
+        return self.adjacency[node_a][node_b]
+
+    def shortest_path(self, source, target, min_bytes=0, weight="hops"):
+        """
+        Shortest path over links that hold at least min_bytes of key. weight="hops" counts
+        hops (bidirectional BFS), weight="rate" prefers fast links (Dijkstra with cost
+        1 / key rate). Returns None if the target is unreachable.
+        """
+        if weight == "hops":
+            return self._fewest_hops(source, target, min_bytes)
+        distances = {source: 0.0}
+        previous = {}
+        queue = [(0.0, source)]
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if node == target:
+                path = [target]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                return path[::-1]
+            if distance > distances[node]:
+                continue
+            for neighbor, link in self.adjacency[node].items():
+                if link.pool.available() < min_bytes:
+                    continue
+                candidate = distance + 1.0 / link.key_rate_bps
+                if candidate < distances.get(neighbor, float("inf")):
+                    distances[neighbor] = candidate
+                    previous[neighbor] = node
+                    heapq.heappush(queue, (candidate, neighbor))
+        return None
+
+    def _fewest_hops(self, source, target, min_bytes):
+        """
+        Bidirectional BFS, always expanding the smaller frontier, so a search only touches
+        a neighbourhood of each endpoint instead of the whole mesh.
+        """
+        if source == target:
+            return [source]
+        parents = ({source: None}, {target: None})
+        frontiers = ([source], [target])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            next_frontier = []
+            for node in frontiers[side]:
+                for neighbor, link in self.adjacency[node].items():
+                    if neighbor in seen or link.pool.available() < min_bytes:
+                        continue
+                    seen[neighbor] = node
+                    if neighbor in other:
+                        return self._join(parents, neighbor)
+                    next_frontier.append(neighbor)
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+        return None
+
+    @staticmethod
+    def _join(parents, meeting):
+        forward, backward = parents
+        path = [meeting]
+        while forward[path[-1]] is not None:
+            path.append(forward[path[-1]])
+        path.reverse()
+        while backward[path[-1]] is not None:
+            path.append(backward[path[-1]])
+        return path
+
+    def max_flow(self, source, target):
+        """
+        Maximum end-to-end key rate (bits/s) between two nodes, by Edmonds-Karp over the
+        link key rates. Each undirected link can carry its rate in either direction.
+        """
+        residual = {node: {neighbor: link.key_rate_bps for neighbor, link in neighbors.items()}
+                    for node, neighbors in self.adjacency.items()}
+        flow = 0.0
+        while True:
+            previous = {source: None}
+            queue = deque([source])
+            while queue and target not in previous:
+                node = queue.popleft()
+                for neighbor, capacity in residual[node].items():
+                    if capacity > 0 and neighbor not in previous:
+                        previous[neighbor] = node
+                        queue.append(neighbor)
+            if target not in previous:
+                return flow
+
+            bottleneck = float("inf")
+            node = target
+            while previous[node] is not None:
+                bottleneck = min(bottleneck, residual[previous[node]][node])
+                node = previous[node]
+            node = target
+            while previous[node] is not None:
+                residual[previous[node]][node] -= bottleneck
+                residual[node][previous[node]] += bottleneck
+                node = previous[node]
+            flow += bottleneck
+
+    def capacity_report(self, demands):
+        """
+        Routes each (source, target, bits_per_second) demand on its shortest path and returns
+        the load and utilization of every link, plus the demands that exceed the max flow.
+        """
+        load = {id(link): 0.0 for link in self.links}
+        unroutable = []
+        infeasible = []
+        for source, target, rate in demands:
+            path = self.shortest_path(source, target)
+            if path is None:
+                unroutable.append((source, target))
+                continue
+            for node_a, node_b in zip(path, path[1:]):
+                load[id(self.link(node_a, node_b))] += rate
+            if rate > self.max_flow(source, target):
+                infeasible.append((source, target))
+
+        links = [{
+            "nodes": link.nodes,
+            "key_rate_bps": link.key_rate_bps,
+            "load_bps": load[id(link)],
+            "utilization": load[id(link)] / link.key_rate_bps,
+        } for link in self.links]
+        return {
+            "links": links,
+            "oversubscribed": [entry["nodes"] for entry in links if entry["utilization"] > 1.0],
+            "unroutable": unroutable,
+            "infeasible": infeasible,
+        }
+
+    @classmethod
+    def random_mesh(cls, num_nodes, degree=3, key_rate_bps=(1e3, 1e5), seed=None, **link_options):
+        """
+        Builds a connected random mesh: a ring for connectivity plus random chords until the
+        mean degree is reached, with key rates drawn log-uniformly from the given range. The
+        link count is capped at that of the complete graph; with two nodes the ring is a
+        single link and with one node there are no links.
+        """
+        rng = random.Random(seed)
+        network = cls()
+        low, high = key_rate_bps
+
+        def rate():
+            return low * (high / low) ** rng.random()
+
+        for i in range(num_nodes):
+            network.add_node(i)
+        ring_links = num_nodes if num_nodes > 2 else num_nodes - 1  # No duplicate or self-loop closing edge
+        for i in range(max(0, ring_links)):
+            network.add_link(i, (i + 1) % num_nodes, rate(), **link_options)
+        target_links = min(num_nodes * degree // 2, num_nodes * (num_nodes - 1) // 2)
+        while len(network.links) < target_links:
+            node_a, node_b = rng.randrange(num_nodes), rng.randrange(num_nodes)
+            if node_a != node_b and node_b not in network.adjacency[node_a]:
+                network.add_link(node_a, node_b, rate(), **link_options)
+        return network
@@ -1,4 +1,29 @@
 from .qkd_protocol import QKDProtocol, SecurityException
-from .key_management import KeyManagement
+from .key_management import KeyExhaustedError, KeyManagement, KeyPool
+from .key_quality import KeyQuality
+from .entanglement import BatchedPairBackend, EntanglementProtocol
+from .decoy_state import DecoyStateProtocol
+from .link_timing import LinkSimulation, LinkTiming
+from .adaptive import AdaptiveBlockController
+from .shared_ring import SharedKeyRing
+from .privacy_amplification import PrivacyAmplifier
+from .audit_log import AuditLog, AuditLogCorrupted
 
-__all__ = ['QKDProtocol', 'SecurityException', 'KeyManagement']
+__all__ = [
+    'QKDProtocol',
+    'SecurityException',
+    'KeyManagement',
+    'KeyPool',
+    'KeyExhaustedError',
+    'KeyQuality',
+    'BatchedPairBackend',
+    'EntanglementProtocol',
+    'DecoyStateProtocol',
+    'LinkSimulation',
+    'LinkTiming',
+    'AdaptiveBlockController',
+    'SharedKeyRing',
+    'PrivacyAmplifier',
+    'AuditLog',
+    'AuditLogCorrupted',
+]
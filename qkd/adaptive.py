@@ -0,0 +1,154 @@
+import math
+import time
+import numpy as np
+from qkd.decoy_state import binary_entropy
+from qkd.qkd_protocol import SecurityException
+
+SAMPLE_FRACTION = 0.15  # Share of sifted bits disclosed for error estimation in QKDProtocol
+
+
+def _last_argmax(values):
+    """
+    Index of the largest value, preferring larger block sizes on ties. When noise leaves no
+    block size with positive predicted key, this moves towards the smallest finite-size penalty.
+    """
+    return len(values) - 1 - int(np.argmax(values[::-1]))
+
+
+class AdaptiveBlockController:
+    def __init__(self, protocol, min_qubits=256, max_qubits=2 ** 20, target_latency=None,
+                 target_key_rate=None, metrics=None, smoothing=0.3, epsilon=1e-10,
+                 ec_efficiency=1.16, growth=1.5):
+        """
+        Chooses QKDProtocol.num_qubits between runs. Latency is modelled as a + b * n, fitted
+        by exponentially weighted least squares over observed runs, and QBER is tracked with
+        an EWMA. The secret fraction of a block includes the finite-size penalty of
+        estimating QBER from a sample, so small blocks produce less key per qubit.
+
+        With target_latency the controller maximizes the predicted key rate among block sizes
+        expected to finish within it; with target_key_rate it picks the smallest block size
+        predicted to reach that rate. Without either it maximizes the key rate.
+        """
+        if target_latency is not None and target_key_rate is not None:
+            raise ValueError("Set at most one of target_latency and target_key_rate.")
+        self.protocol = protocol
+        self.min_qubits = min_qubits
+        self.max_qubits = max_qubits
+        self.target_latency = target_latency
+        self.target_key_rate = target_key_rate
+        self.metrics = metrics
+        self.smoothing = smoothing
+        self.epsilon = epsilon
+        self.ec_efficiency = ec_efficiency
+        self.candidates = self._candidate_sizes(growth)
+
+        self.qber = None
+        self.decay = 1 - smoothing
+        self.sums = np.zeros(5)  # Weighted sums of 1, n, t, n^2, n*t
+        self.history = []
+
+    def _candidate_sizes(self, growth):
+        sizes = []
+        size = float(self.min_qubits)
+        while size < self.max_qubits:
+            sizes.append(int(size))
+            size *= growth
+        sizes.append(self.max_qubits)
+        return np.unique(sizes)
+
+    def latency_model(self):
+        """
+        Returns the fitted (intercept, seconds per qubit). Until two distinct block sizes have
+        been seen, latency is assumed proportional to block size.
+        """
+        weight, sum_n, sum_t, sum_nn, sum_nt = self.sums
+        if weight == 0:
+            return 0.0, 0.0
+        denominator = weight * sum_nn - sum_n ** 2
+        if denominator <= 1e-9 * weight * sum_nn:
+            return 0.0, sum_t / sum_n
+        slope = (weight * sum_nt - sum_n * sum_t) / denominator
+        if slope <= 0:
+            return 0.0, sum_t / sum_n
+        return max(0.0, (sum_t - slope * sum_n) / weight), slope
+
+    def predict_latency(self, num_qubits):
+        intercept, slope = self.latency_model()
+        return intercept + slope * np.asarray(num_qubits, dtype=float)
+
+    def secret_fraction(self, num_qubits):
+        """
+        Expected secret bits per qubit sent: half the qubits survive sifting, SAMPLE_FRACTION
+        of those are disclosed, and the rest lose error-correction leakage plus the entropy
+        of the QBER upper bound, which widens by sqrt(ln(1/epsilon) / 2k) for k sample bits.
+        """
+        sifted = np.asarray(num_qubits, dtype=float) / 2
+        sample = np.maximum(1.0, SAMPLE_FRACTION * sifted)
+        qber = self.qber if self.qber is not None else 0.0
+        deviation = np.sqrt(math.log(1 / self.epsilon) / (2 * sample))
+        fraction = 1 - binary_entropy(np.minimum(0.5, qber + deviation)) - self.ec_efficiency * binary_entropy(qber)
+        return np.maximum(0.0, fraction) * (1 - SAMPLE_FRACTION) / 2
+
+    def predict_key_rate(self, num_qubits):
+        num_qubits = np.asarray(num_qubits, dtype=float)
+        latency = self.predict_latency(num_qubits)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = num_qubits * self.secret_fraction(num_qubits) / latency
+        return np.where(latency > 0, rate, 0.0)
+
+    def choose(self):
+        """
+        Picks the block size for the next run. Before any latency has been observed the
+        current setting is kept, clamped to the allowed range.
+        """
+        if self.sums[0] == 0:
+            return int(min(max(self.protocol.num_qubits, self.min_qubits), self.max_qubits))
+        sizes = self.candidates
+        rates = self.predict_key_rate(sizes)
+        if self.target_key_rate is not None:
+            meeting = np.flatnonzero(rates >= self.target_key_rate)
+            return int(sizes[meeting[0]] if meeting.size else sizes[_last_argmax(rates)])
+        if self.target_latency is not None:
+            within = self.predict_latency(sizes) <= self.target_latency
+            if not within.any():
+                return int(sizes[0])
+            rates = np.where(within, rates, -1.0)
+        return int(sizes[_last_argmax(rates)])
+
+    def observe(self, num_qubits, latency, qber):
+        """
+        Folds one finished run into the latency fit and the QBER estimate.
+        """
+        self.sums = self.decay * self.sums + np.array(
+            [1.0, num_qubits, latency, float(num_qubits) ** 2, num_qubits * latency])
+        if qber is not None:
+            self.qber = qber if self.qber is None else (1 - self.smoothing) * self.qber + self.smoothing * qber
+        self.history.append({"num_qubits": num_qubits, "latency": latency, "qber": qber})
+
+    def run(self):
+        """
+        Runs the protocol once at the chosen block size. Returns the secure key, or None if
+        the run was aborted; the observed QBER and latency are fed back either way.
+        """
+        num_qubits = self.choose()
+        if num_qubits != self.protocol.num_qubits and self.metrics is not None:
+            self.metrics.increment("adaptive.resizes")
+        self.protocol.num_qubits = num_qubits
+        self._export(num_qubits)
+
+        started = time.perf_counter()
+        try:
+            key = self.protocol.run_protocol()
+        except SecurityException:
+            key = None
+        self.observe(num_qubits, time.perf_counter() - started, self.protocol.last_error_rate)
+        if self.metrics is not None and self.qber is not None:
+            self.metrics.set_gauge("adaptive.qber", self.qber)
+        return key
+
+    def _export(self, num_qubits):
+        if self.metrics is None:
+            return
+        self.metrics.set_gauge("adaptive.num_qubits", num_qubits)
+        self.metrics.set_gauge("adaptive.predicted_latency", float(self.predict_latency(num_qubits)))
+        self.metrics.set_gauge("adaptive.predicted_key_rate", float(self.predict_key_rate(num_qubits)))
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from qkd.key_management import KeyManagement
+
+EVENT_STORE = 1
+EVENT_RETRIEVE = 2
+EVENT_DELETE = 3
+EVENT_NAMES = {EVENT_STORE: "store", EVENT_RETRIEVE: "retrieve", EVENT_DELETE: "delete"}
+EVENT_CODES = {name: code for code, name in EVENT_NAMES.items()}
+
+LENGTH = struct.Struct(">I")
+RECORD_HEADER = struct.Struct(">QdBH")  # sequence, timestamp, event, participant length
+KEY_HEADER = struct.Struct(">BI")       # key field kind, key field length
+HASH_SIZE = 32
+GENESIS_HASH = bytes(HASH_SIZE)
+MIN_RECORD_SIZE = RECORD_HEADER.size + KEY_HEADER.size + HASH_SIZE
+MAX_RECORD_SIZE = 1 << 24
+
+KEY_ABSENT = 0
+KEY_FINGERPRINT = 1  # SHA-256 of the key
+KEY_MATERIAL = 2     # The key itself, JSON-encoded
+
+
+class AuditLogCorrupted(ValueError):
+    """
+    Raised when a record is malformed or its hash does not continue the chain, i.e. the
+    log was altered.
+    """
+    pass
+
+
+def _key_bytes(key):
+    return json.dumps(key, separators=(",", ":")).encode("utf-8")
+
+
+def read_records(path):
+    """
+    Yields every record of an audit log as a dict, verifying the hash chain as it goes.
+    A partially written final record (from a crash mid-commit) is ignored, but only if
+    everything readable of it is consistent with a torn write: a plausible length, the next
+    sequence number and, once present, participant and key lengths that add up to that
+    length. Anything else, including a length prefix edited to run past the end of the
+    file, raises AuditLogCorrupted.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    view = memoryview(data)
+    offset = 0
+    previous = GENESIS_HASH
+    sequence = -1
+    while offset + LENGTH.size <= len(data):
+        (length,) = LENGTH.unpack_from(view, offset)
+        end = offset + LENGTH.size + length
+        if not MIN_RECORD_SIZE <= length <= MAX_RECORD_SIZE:
+            raise AuditLogCorrupted(f"Implausible record length {length} at byte offset {offset}.")
+        if end > len(data):
+            _check_torn(view[offset + LENGTH.size:], length, sequence + 1, offset)
+            return
+        body = view[offset + LENGTH.size:end - HASH_SIZE]
+        chain = bytes(view[end - HASH_SIZE:end])
+        if hashlib.sha256(previous + body).digest() != chain:
+            raise AuditLogCorrupted(f"Hash chain broken at byte offset {offset}.")
+        record = _decode_body(body, offset)
+        record.update(offset=offset, end=end, hash=chain)
+        yield record
+        previous = chain
+        sequence = record["sequence"]
+        offset = end
+
+
+def _check_torn(partial, length, sequence, offset):
+    """
+    Raises AuditLogCorrupted unless the incomplete tail could be a record cut short by a crash.
+    """
+    if partial.nbytes < RECORD_HEADER.size:
+        return
+    record_sequence, _, event, participant_length = RECORD_HEADER.unpack_from(partial)
+    if record_sequence != sequence or event not in EVENT_NAMES:
+        raise AuditLogCorrupted(f"Incomplete record at byte offset {offset} does not follow the log.")
+    key_offset = RECORD_HEADER.size + participant_length
+    if partial.nbytes < key_offset + KEY_HEADER.size:
+        return
+    _, key_length = KEY_HEADER.unpack_from(partial, key_offset)
+    if key_offset + KEY_HEADER.size + key_length + HASH_SIZE != length:
+        raise AuditLogCorrupted(f"Length prefix at byte offset {offset} does not match its record.")
+
+
+def _decode_body(body, offset=0):
+    try:
+        sequence, timestamp, event, participant_length = RECORD_HEADER.unpack_from(body)
+        position = RECORD_HEADER.size
+        participant = str(body[position:position + participant_length], "utf-8")
+        position += participant_length
+        kind, key_length = KEY_HEADER.unpack_from(body, position)
+        position += KEY_HEADER.size
+        if position + key_length != body.nbytes:
+            raise ValueError("field lengths do not add up to the record length")
+        key_field = bytes(body[position:])
+        record = {"sequence": sequence, "timestamp": timestamp, "event": EVENT_NAMES[event],
+                  "participant": participant, "fingerprint": None, "key": None}
+        if kind == KEY_FINGERPRINT:
+            record["fingerprint"] = key_field.hex()
+        elif kind == KEY_MATERIAL:
+            record["key"] = json.loads(key_field)
+            record["fingerprint"] = hashlib.sha256(key_field).hexdigest()
+        elif kind != KEY_ABSENT:
+            raise ValueError(f"unknown key field kind {kind}")
+    except (struct.error, KeyError, ValueError) as e:
+        raise AuditLogCorrupted(f"Malformed record at byte offset {offset}: {e}") from e
+    return record
+
+
+class AuditLog:
+    def __init__(self, path, commit_interval=0.01, max_batch=4096, include_keys=False, fsync=True):
+        """
+        Append-only, hash-chained log of key events. Each record is
+        length | sequence | timestamp | event | participant | key field | chain hash, where the
+        chain hash is SHA-256 over the previous record's hash and this record's body, so
+        editing, removing or reordering records breaks every later hash.
+
+        append() only encodes the record into memory. A background thread writes pending
+        records as one group and fsyncs them every commit_interval seconds (the durability
+        window), or sooner once max_batch records are waiting. Callers that need a record on
+        disk before proceeding call wait(). Keys are logged as SHA-256 fingerprints unless
+        include_keys is set, which lets replay() rebuild the full key store.
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.include_keys = include_keys
+        self.fsync = fsync
+
+        self.last_hash = GENESIS_HASH
+        self.next_sequence = 0
+        valid_end = 0
+        if os.path.exists(path):
+            for record in read_records(path):
+                self.last_hash = record["hash"]
+                self.next_sequence = record["sequence"] + 1
+                valid_end = record["end"]
+        self.file = open(path, "ab")
+        if self.file.tell() > valid_end:
+            logging.warning(f"Dropping {self.file.tell() - valid_end} bytes of a torn record at the end of {path}.")
+            self.file.truncate(valid_end)
+
+        self.pending = []
+        self.pending_sequence = self.next_sequence - 1
+        self.committed_sequence = self.next_sequence - 1
+        self.stats = {"records": 0, "commits": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._committed = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._commit_loop, name="audit-log-commit", daemon=True)
+        self._thread.start()
+
+    def append(self, event, participant, key=None):
+        """
+        Adds a record for a "store", "retrieve" or "delete" event and returns its sequence
+        number without waiting for the disk.
+        """
+        event = EVENT_CODES[event]
+        participant = str(participant).encode("utf-8")
+        if key is None:
+            kind, key_field = KEY_ABSENT, b""
+        elif self.include_keys:
+            kind, key_field = KEY_MATERIAL, _key_bytes(key)
+        else:
+            kind, key_field = KEY_FINGERPRINT, hashlib.sha256(_key_bytes(key)).digest()
+
+        with self._lock:
+            if self._closed:
+                raise ValueError("Audit log is closed.")
+            sequence = self.next_sequence
+            self.next_sequence += 1
+            body = (RECORD_HEADER.pack(sequence, time.time(), event, len(participant)) + participant
+                    + KEY_HEADER.pack(kind, len(key_field)) + key_field)
+            self.last_hash = hashlib.sha256(self.last_hash + body).digest()
+            self.pending.append(LENGTH.pack(len(body) + HASH_SIZE) + body + self.last_hash)
+            self.pending_sequence = sequence
+            full = len(self.pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+        return sequence
+
+    def wait(self, sequence=None, timeout=None):
+        """
+        Blocks until the given record (by default every record appended so far) is durable.
+        Returns False on timeout and re-raises a write error from the commit thread.
+        """
+        with self._lock:
+            target = self.pending_sequence if sequence is None else sequence
+            self._wakeup.set()
+            done = self._committed.wait_for(
+                lambda: self.committed_sequence >= target or self._error is not None, timeout)
+            if self._error is not None:
+                raise self._error
+            return done
+
+    flush = wait
+
+    def _commit_loop(self):
+        while True:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            with self._lock:
+                batch, self.pending = self.pending, []
+                sequence = self.pending_sequence
+                closed = self._closed
+            if batch and self._error is None:
+                data = b"".join(batch)
+                try:
+                    self.file.write(data)
+                    self.file.flush()
+                    if self.fsync:
+                        os.fsync(self.file.fileno())
+                except OSError as e:
+                    self._error = e
+                with self._lock:
+                    if self._error is None:
+                        self.committed_sequence = sequence
+                        self.stats["records"] += len(batch)
+                        self.stats["commits"] += 1
+                        self.stats["bytes"] += len(data)
+                    self._committed.notify_all()
+            if closed:
+                return
+
+    def close(self):
+        """
+        Commits everything still pending and closes the file.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay_fingerprints(path):
+    """
+    Returns {participant: key fingerprint} for every participant whose latest store was not
+    followed by a delete. Works for logs written with or without include_keys.
+    """
+    fingerprints = {}
+    for record in read_records(path):
+        if record["event"] == "store":
+            fingerprints[record["participant"]] = record["fingerprint"]
+        elif record["event"] == "delete":
+            fingerprints.pop(record["participant"], None)
+    return fingerprints
+
+
+def replay(path):
+    """
+    Rebuilds key-store state from an audit log written with include_keys. Returns a
+    KeyManagement holding the key of every participant whose latest store was not followed
+    by a delete. Raises ValueError for logs that only hold fingerprints; use
+    replay_fingerprints() for those.
+    """
+    key_manager = KeyManagement()
+    for record in read_records(path):
+        if record["event"] == "store":
+            if record["key"] is None:
+                raise ValueError("Audit log holds key fingerprints only; it was not written with include_keys.")
+            key_manager.key_store[record["participant"]] = record["key"]
+        elif record["event"] == "delete":
+            key_manager.key_store.pop(record["participant"], None)
+    return key_manager
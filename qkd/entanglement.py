@@ -0,0 +1,152 @@
+import numpy as np
+from qkd.qkd_protocol import SecurityException
+
+# |Phi+> = (|00> + |11>) / sqrt(2), stored as a 2x2 amplitude matrix indexed [qubit A, qubit B].
+PHI_PLUS = np.array([[1.0, 0.0], [0.0, 1.0]]) / np.sqrt(2)
+
+# Measurement angles in the X-Z plane. 0 is the Z basis and pi/4 the Hadamard (X) basis.
+BBM92_ANGLES_A = np.array([0.0, np.pi / 4])
+BBM92_ANGLES_B = np.array([0.0, np.pi / 4])
+E91_ANGLES_A = np.array([0.0, np.pi / 8, np.pi / 4])
+E91_ANGLES_B = np.array([np.pi / 8, np.pi / 4, 3 * np.pi / 8])
+
+# CHSH combinations for E91 as (alice index, bob index, sign): a1=0, a3=pi/4, b1=pi/8, b3=3pi/8.
+E91_CHSH_TERMS = ((0, 0, 1), (0, 2, -1), (2, 0, 1), (2, 2, 1))
+# Matching angles that yield key bits: (pi/8, pi/8) and (pi/4, pi/4).
+E91_KEY_SETTINGS = ((1, 0), (2, 1))
+
+
+def basis_operators(angles):
+    """
+    Builds measurement operators for an array of angles. Row k of each 2x2 operator is
+    the bra of outcome k, so applying it to a state gives the outcome amplitudes.
+    """
+    cos, sin = np.cos(angles), np.sin(angles)
+    return np.stack([np.stack([cos, sin], axis=-1), np.stack([-sin, cos], axis=-1)], axis=-2)
+
+
+class BatchedPairBackend:
+    def __init__(self, seed=None):
+        """
+        Simulates batches of two-qubit pairs as an (n, 2, 2) array of real amplitudes.
+        Every operation is a single einsum over the batch, with no per-pair Python objects.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def bell_pairs(self, num_pairs):
+        return np.broadcast_to(PHI_PLUS, (num_pairs, 2, 2))
+
+    def _sample(self, probs):
+        """
+        Draws one outcome index per row of an (n, k) probability matrix.
+        """
+        cumulative = np.cumsum(probs, axis=1)
+        u = self.rng.random(probs.shape[0]) * cumulative[:, -1]
+        return (u[:, None] >= cumulative[:, :-1]).sum(axis=1)
+
+    def measure(self, states, angles_a, angles_b, visibility=1.0):
+        """
+        Measures qubit A and qubit B of every pair at the given per-pair angles.
+        With visibility below one, that fraction of pairs is replaced by white noise
+        (a Werner state). Returns two uint8 outcome arrays.
+        """
+        ops_a = basis_operators(angles_a)
+        ops_b = basis_operators(angles_b)
+        amplitudes = np.einsum("nai,nbj,nij->nab", ops_a, ops_b, states, optimize=True)
+        joint = self._sample((amplitudes ** 2).reshape(-1, 4))
+        outcomes_a = (joint >> 1).astype(np.uint8)
+        outcomes_b = (joint & 1).astype(np.uint8)
+
+        if visibility < 1.0:
+            noisy = self.rng.random(joint.size) >= visibility
+            outcomes_a[noisy] = self.rng.integers(0, 2, noisy.sum(), dtype=np.uint8)
+            outcomes_b[noisy] = self.rng.integers(0, 2, noisy.sum(), dtype=np.uint8)
+        return outcomes_a, outcomes_b
+
+    def intercept_resend(self, states, fraction):
+        """
+        An eavesdropper measures qubit B of a fraction of the pairs in a random Z or X basis
+        and resends the result, collapsing those pairs to product states.
+        """
+        states = np.array(states)
+        attacked = np.flatnonzero(self.rng.random(states.shape[0]) < fraction)
+        if attacked.size == 0:
+            return states
+
+        ops = basis_operators(self.rng.choice(BBM92_ANGLES_B, attacked.size))
+        amplitudes = np.einsum("nbj,naj->nab", ops, states[attacked])
+        outcome = self._sample((amplitudes ** 2).sum(axis=1))
+        rows = np.arange(attacked.size)
+        alice = amplitudes[rows, :, outcome]
+        alice /= np.linalg.norm(alice, axis=1, keepdims=True)
+        states[attacked] = np.einsum("na,nj->naj", alice, ops[rows, outcome])
+        return states
+
+
+def chsh_value(outcomes_a, outcomes_b, settings_a, settings_b, terms=E91_CHSH_TERMS):
+    """
+    Computes S = E(a1,b1) - E(a1,b3) + E(a3,b1) + E(a3,b3) from measurement records.
+    Quantum correlations reach 2*sqrt(2); any local-realistic model stays at or below 2.
+    """
+    agree = 1.0 - 2.0 * (outcomes_a ^ outcomes_b)
+    s = 0.0
+    for index_a, index_b, sign in terms:
+        mask = (settings_a == index_a) & (settings_b == index_b)
+        if mask.any():
+            s += sign * agree[mask].mean()
+    return float(s)
+
+
+class EntanglementProtocol:
+    def __init__(self, num_pairs=2048, error_threshold=0.11, protocol="bbm92", backend=None,
+                 visibility=1.0, eavesdrop_fraction=0.0, chsh_threshold=2.0):
+        """
+        Entanglement-based QKD (BBM92 or E91) over a pluggable pair-simulation backend.
+        """
+        if protocol not in ("bbm92", "e91"):
+            raise ValueError(f"Unknown entanglement protocol: {protocol}")
+        self.num_pairs = num_pairs
+        self.error_threshold = error_threshold
+        self.protocol = protocol
+        self.backend = backend if backend is not None else BatchedPairBackend()
+        self.visibility = visibility
+        self.eavesdrop_fraction = eavesdrop_fraction
+        self.chsh_threshold = chsh_threshold
+
+    def run_protocol(self):
+        """
+        Distributes Bell pairs, measures them, sifts and estimates QBER (and CHSH for E91).
+        Returns the sifted key as packed bits with the channel statistics.
+        """
+        backend = self.backend
+        angles_a, angles_b = (BBM92_ANGLES_A, BBM92_ANGLES_B) if self.protocol == "bbm92" else (E91_ANGLES_A, E91_ANGLES_B)
+        settings_a = backend.rng.integers(0, angles_a.size, self.num_pairs)
+        settings_b = backend.rng.integers(0, angles_b.size, self.num_pairs)
+
+        states = backend.bell_pairs(self.num_pairs)
+        if self.eavesdrop_fraction > 0:
+            states = backend.intercept_resend(states, self.eavesdrop_fraction)
+        outcomes_a, outcomes_b = backend.measure(states, angles_a[settings_a], angles_b[settings_b], self.visibility)
+
+        if self.protocol == "bbm92":
+            sifted = settings_a == settings_b
+            chsh = None
+        else:
+            sifted = np.zeros(self.num_pairs, dtype=bool)
+            for index_a, index_b in E91_KEY_SETTINGS:
+                sifted |= (settings_a == index_a) & (settings_b == index_b)
+            chsh = chsh_value(outcomes_a, outcomes_b, settings_a, settings_b)
+
+        key_a, key_b = outcomes_a[sifted], outcomes_b[sifted]
+        qber = float((key_a ^ key_b).mean()) if key_a.size else 1.0
+        if qber > self.error_threshold:
+            raise SecurityException(f"QBER {qber:.4f} exceeds threshold; possible eavesdropping.")
+        if chsh is not None and chsh <= self.chsh_threshold:
+            raise SecurityException(f"CHSH value {chsh:.3f} shows no Bell violation; possible eavesdropping.")
+
+        return {
+            "key": np.packbits(key_a),
+            "key_bits": int(key_a.size),
+            "qber": qber,
+            "chsh": chsh,
+        }
@@ -1,5 +1,99 @@
+import math
+import numpy as np
+from scipy.stats import binom
 from qkd.qkd_protocol import SecurityException
 
+CONTINUE = "continue"
+ACCEPT = "accept"
+REJECT = "reject"
+
+
+def threshold_false_alarm(p0, threshold, sample_bits):
+    """
+    Probability that an honest block with error rate p0 still fails the final check
+    error_rate > threshold on sample_bits sample bits.
+    """
+    return float(binom.sf(math.floor(threshold * sample_bits), sample_bits, p0))
+
+
+class SequentialErrorTest:
+    def __init__(self, p0, p1, alpha=1e-3, beta=1e-3, method="sprt"):
+        """
+        Sequential test of the QBER on sample bits as they arrive: H0 says errors occur at
+        rate p0 (honest channel), H1 at rate p1 (eavesdropping). Each mismatch adds
+        log(p1 / p0) to the log-likelihood ratio and each match adds log((1 - p1) / (1 - p0)).
+
+        method="sprt" is Wald's test: it rejects once the ratio exceeds log((1 - beta) / alpha),
+        which keeps the false-alarm rate of honest blocks below alpha, and accepts H0 below
+        log(beta / (1 - alpha)), after which no further bits are needed. method="cusum" never
+        accepts; it resets the statistic at zero and alarms at log(1 / alpha), which also
+        catches an attack that starts partway through a block. Its false-alarm probability
+        per block grows with the number of sample bits, so alpha should be set lower.
+        """
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("Error rates must satisfy 0 < p0 < p1 < 1.")
+        if method not in ("sprt", "cusum"):
+            raise ValueError(f"Unknown sequential test: {method}")
+        self.p0 = p0
+        self.p1 = p1
+        self.method = method
+        self.error_weight = math.log(p1 / p0)
+        self.match_weight = math.log((1 - p1) / (1 - p0))
+        if method == "sprt":
+            self.upper = math.log((1 - beta) / alpha)
+            self.lower = math.log(beta / (1 - alpha))
+        else:
+            self.upper = math.log(1 / alpha)
+            self.lower = -math.inf
+        self.reset()
+
+    @classmethod
+    def budgeted(cls, p0, p1, false_alarm, threshold, sample_bits, beta=1e-3, method="sprt"):
+        """
+        Builds a test whose alarms, together with the final threshold check on the same
+        block, keep the false-alarm rate of honest blocks below false_alarm: the threshold
+        check's own rate on sample_bits bits is subtracted and the rest goes to this test
+        (a union bound). Raises ValueError if the threshold check alone exceeds the budget.
+        """
+        remaining = false_alarm - threshold_false_alarm(p0, threshold, sample_bits)
+        if remaining <= 0:
+            raise ValueError(f"The final threshold check alone exceeds a false-alarm budget of {false_alarm}.")
+        return cls(p0, p1, alpha=remaining, beta=beta, method=method)
+
+    def reset(self):
+        self.statistic = 0.0
+        self.observed = 0
+        self.errors = 0
+        self.decision = CONTINUE
+
+    def update(self, mismatches):
+        """
+        Consumes a chunk of sample outcomes (truthy where Alice's and Bob's bits differ) and
+        returns the decision so far. Bits after the crossing point are not counted.
+        """
+        if self.decision != CONTINUE:
+            return self.decision
+        mismatches = np.asarray(mismatches, dtype=bool)
+        if mismatches.size == 0:
+            return self.decision
+        steps = np.where(mismatches, self.error_weight, self.match_weight)
+        path = self.statistic + np.cumsum(steps)
+        if self.method == "cusum":
+            # S_k = max(0, S_{k-1} + step) is the walk minus its running minimum, floored at zero
+            path = path - np.minimum(np.minimum.accumulate(path), 0.0)
+        crossed = np.flatnonzero((path >= self.upper) | (path <= self.lower))
+        stop = int(crossed[0]) + 1 if crossed.size else mismatches.size
+        self.observed += stop
+        self.errors += int(mismatches[:stop].sum())
+        self.statistic = float(path[stop - 1])
+        if crossed.size:
+            self.decision = REJECT if self.statistic >= self.upper else ACCEPT
+        return self.decision
+
+    def error_rate(self):
+        return self.errors / self.observed if self.observed else 0.0
+
+
 class ErrorHandling:
     def error_reconciliation(self, key):
         """
@@ -16,6 +110,21 @@ class ErrorHandling:
         if error_rate > threshold:
             raise SecurityException("Eavesdropping detected!")
 
+    def detect_eavesdropping_sequential(self, mismatch_chunks, test):
+        """
+        Streams chunks of sample outcomes through a SequentialErrorTest and raises
+        SecurityException as soon as it rejects, without waiting for the remaining chunks.
+        Returns the final decision otherwise.
+        """
+        for chunk in mismatch_chunks:
+            if test.update(chunk) == REJECT:
+                raise SecurityException(
+                    f"Eavesdropping detected after {test.observed} sample bits "
+                    f"({test.errors} errors).")
+            if test.decision == ACCEPT:
+                break
+        return test.decision
+
     def privacy_amplification(self, key):
         """
         Applies a hash-based transformation on the key to reduce size and remove leaked information.
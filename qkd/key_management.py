@@ -1,18 +1,27 @@
+import json
+import os
+
 class KeyManagement:
-    def __init__(self):
+    def __init__(self, audit_log=None):
         self.key_store = {}
+        self.audit_log = audit_log  # Optional qkd.audit_log.AuditLog recording every key event
 
     def store_key(self, key, participant):
         """
         Stores the generated key securely for a participant.
         """
         self.key_store[participant] = key
+        if self.audit_log is not None:
+            self.audit_log.append("store", participant, key)
 
     def retrieve_key(self, participant):
         """
         Retrieves the stored key for a participant.
         """
-        return self.key_store.get(participant)
+        key = self.key_store.get(participant)
+        if self.audit_log is not None and key is not None:
+            self.audit_log.append("retrieve", participant, key)
+        return key
 
     def delete_key(self, participant):
         """
@@ -20,9 +29,108 @@ class KeyManagement:
         """
         if participant in self.key_store:
             del self.key_store[participant]
+            if self.audit_log is not None:
+                self.audit_log.append("delete", participant)
 
     def validate_key(self, key):
         """
         Validates that the key meets specific security criteria.
         """
         return isinstance(key, list) and all(bit in [0, 1] for bit in key)
+
+    def save(self, path):
+        """
+        Persists the key store to a JSON file, replacing it atomically. The file holds raw
+        keys, so it is created readable by the owner only.
+        """
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # A leftover file would keep its old, possibly wider, mode
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(self.key_store, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Loads keys from a JSON file written by save(); a missing file is an empty store.
+        """
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            self.key_store.update(json.load(f))
+
+
+class KeyExhaustedError(Exception):
+    """
+    Raised when a key pool cannot supply the requested amount of key material.
+    """
+    pass
+
+
+class KeyPool:
+    def __init__(self, capacity=None):
+        """
+        FIFO store of raw key bytes. Material is handed out exactly once, in the order it
+        was added; capacity (in bytes) caps how much unconsumed material is kept.
+        """
+        self.capacity = capacity
+        self.buffer = bytearray()
+        self.start = 0
+        self.produced = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    def available(self):
+        return len(self.buffer) - self.start
+
+    def skip(self, num_bytes):
+        """
+        Discards key material without returning it, e.g. to catch up with a peer's offset.
+        """
+        if num_bytes > self.available():
+            raise KeyExhaustedError(f"Cannot skip {num_bytes} bytes; only {self.available()} are available.")
+        self.start += num_bytes
+        self.consumed += num_bytes
+        self._compact()
+
+    def peek(self, num_bytes, offset=0):
+        """
+        Returns num_bytes of key material starting offset bytes ahead, without consuming it.
+        """
+        if offset + num_bytes > self.available():
+            raise KeyExhaustedError(
+                f"Requested {num_bytes} bytes at +{offset} but only {self.available()} are available.")
+        with memoryview(self.buffer) as view:
+            return bytes(view[self.start + offset:self.start + offset + num_bytes])
+
+    def add(self, material):
+        """
+        Appends key material, dropping whatever does not fit. Returns the bytes accepted.
+        """
+        accepted = len(material)
+        if self.capacity is not None:
+            accepted = max(0, min(accepted, self.capacity - self.available()))
+        self.buffer += memoryview(material)[:accepted]
+        self.produced += accepted
+        self.dropped += len(material) - accepted
+        return accepted
+
+    def take(self, num_bytes):
+        """
+        Removes and returns the next num_bytes of key material.
+        """
+        if num_bytes > self.available():
+            raise KeyExhaustedError(f"Requested {num_bytes} bytes but only {self.available()} are available.")
+        material = self.peek(num_bytes)
+        self.start += num_bytes
+        self.consumed += num_bytes
+        self._compact()
+        return material
+
+    def _compact(self):
+        """
+        Drops consumed material once it makes up more than half of the buffer.
+        """
+        if self.start > len(self.buffer) // 2:
+            del self.buffer[:self.start]
+            self.start = 0
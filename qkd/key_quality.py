@@ -0,0 +1,198 @@
+import math
+import numpy as np
+from scipy.special import erfc, gammaincc
+
+BYTE_ENTROPY_MIN_BYTES = 1 << 16  # Below this a 256-bin histogram is too sparse to estimate from
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(packed):
+        return _POPCOUNT_TABLE[packed]
+
+
+def pack_bits(bits):
+    """
+    Packs a sequence of 0/1 values into a uint8 array, returning it with the bit count.
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    return np.packbits(bits), int(bits.size)
+
+
+def as_packed(key, n_bits=None):
+    """
+    Accepts a hex key (as returned by QKDProtocol.run_protocol), bytes, or an already packed
+    uint8 array, and returns (packed, n_bits) with any bits past n_bits cleared.
+    """
+    if isinstance(key, str):
+        packed = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+    elif isinstance(key, (bytes, bytearray, memoryview)):
+        packed = np.frombuffer(key, dtype=np.uint8)
+    else:
+        packed = np.asarray(key, dtype=np.uint8)
+    if n_bits is None:
+        n_bits = packed.size * 8
+    return _truncate(packed, n_bits), n_bits
+
+
+def _truncate(packed, n_bits):
+    """
+    Keeps only the first n_bits bits, zeroing the unused low bits of the final byte.
+    """
+    packed = packed[:(n_bits + 7) // 8]
+    spare = -n_bits % 8
+    if spare:
+        packed = packed.copy()
+        packed[-1] &= (0xFF << spare) & 0xFF
+    return packed
+
+
+def _shifted(packed, n_bits, shift):
+    """
+    Returns bits [shift, n_bits) re-packed to start at bit 0, so that XOR against the
+    original compares every bit with the one `shift` positions later.
+    """
+    whole, part = divmod(shift, 8)
+    tail = packed[whole:]
+    if part:
+        following = np.zeros_like(tail)
+        following[:-1] = tail[1:]
+        tail = (tail << part) | (following >> (8 - part))
+    return _truncate(tail, n_bits - shift)
+
+
+def ones_count(packed):
+    return int(_popcount(packed).sum(dtype=np.int64))
+
+
+class KeyQuality:
+    def __init__(self, alpha=0.01, block_size=128, serial_m=3, shifts=(1, 2, 8, 16)):
+        """
+        Randomness checks over packed key bits, following NIST SP 800-22 where applicable.
+        block_size is in bits and must be a multiple of 8.
+        """
+        if block_size % 8:
+            raise ValueError("Block size must be a multiple of 8 bits.")
+        if serial_m < 3:
+            raise ValueError("The serial test needs patterns of at least 3 bits.")
+        self.alpha = alpha
+        self.block_size = block_size
+        self.serial_m = serial_m
+        self.shifts = shifts
+
+    def entropy(self, packed, n_bits):
+        """
+        Shannon and min-entropy per bit. Keys of at least BYTE_ENTROPY_MIN_BYTES are
+        estimated from the byte histogram, which also catches dependence between bits;
+        shorter keys from the bit balance alone. The Shannon estimate carries the
+        Miller-Madow bias correction and is capped at 1.
+        """
+        full_bytes = n_bits // 8
+        if full_bytes >= BYTE_ENTROPY_MIN_BYTES:
+            counts, total, symbol_bits = np.bincount(packed[:full_bytes], minlength=256), full_bytes, 8
+        else:
+            ones = ones_count(packed)
+            counts, total, symbol_bits = np.array([n_bits - ones, ones]), n_bits, 1
+        counts = counts[counts > 0]
+        probs = counts / total
+        shannon = float(-(probs * np.log2(probs)).sum()) + (counts.size - 1) / (2 * total * math.log(2))
+        min_entropy = max(0.0, -math.log2(probs.max()))
+        return min(1.0, shannon / symbol_bits), min_entropy / symbol_bits
+
+    def monobit(self, packed, n_bits):
+        """
+        Frequency test: p-value for the balance of ones and zeros.
+        """
+        s = 2 * ones_count(packed) - n_bits
+        return float(erfc(abs(s) / math.sqrt(2 * n_bits)))
+
+    def runs(self, packed, n_bits):
+        """
+        Runs test: p-value for the number of uninterrupted runs of identical bits.
+        """
+        pi = ones_count(packed) / n_bits
+        if abs(pi - 0.5) >= 2 / math.sqrt(n_bits):
+            return 0.0
+        transitions = ones_count(_truncate(packed, n_bits - 1) ^ _shifted(packed, n_bits, 1))
+        v_obs = transitions + 1
+        expected = 2 * n_bits * pi * (1 - pi)
+        return float(erfc(abs(v_obs - expected) / (2 * math.sqrt(2 * n_bits) * pi * (1 - pi))))
+
+    def block_frequency(self, packed, n_bits):
+        """
+        Block frequency test: p-value for the proportion of ones within fixed-size blocks.
+        Returns None when the key is shorter than one block.
+        """
+        num_blocks = n_bits // self.block_size
+        if num_blocks == 0:
+            return None
+        block_bytes = self.block_size // 8
+        blocks = packed[:num_blocks * block_bytes].reshape(num_blocks, block_bytes)
+        proportions = _popcount(blocks).sum(axis=1, dtype=np.int64) / self.block_size
+        chi_squared = 4 * self.block_size * float(((proportions - 0.5) ** 2).sum())
+        return float(gammaincc(num_blocks / 2, chi_squared / 2))
+
+    def serial(self, packed, n_bits):
+        """
+        Serial test: two p-values for the uniformity of overlapping m-bit patterns.
+        """
+        m = self.serial_m
+        bits = np.unpackbits(packed)[:n_bits]
+        extended = np.concatenate([bits, bits[:m - 1]])
+        patterns = np.zeros(n_bits, dtype=np.uint32)
+        for j in range(m):
+            patterns = (patterns << 1) | extended[j:j + n_bits]
+
+        def psi_squared(width):
+            if width <= 0:
+                return 0.0
+            counts = np.bincount(patterns >> (m - width), minlength=2 ** width).astype(np.float64)
+            return float((counts ** 2).sum()) * 2 ** width / n_bits - n_bits
+
+        psi_m, psi_m1, psi_m2 = psi_squared(m), psi_squared(m - 1), psi_squared(m - 2)
+        p1 = gammaincc(2 ** (m - 2), (psi_m - psi_m1) / 2)
+        p2 = gammaincc(2 ** (m - 3), (psi_m - 2 * psi_m1 + psi_m2) / 2)
+        return float(p1), float(p2)
+
+    def autocorrelation(self, packed, n_bits):
+        """
+        Autocorrelation test for each configured shift: p-value for the number of bits
+        that differ from the bit `shift` positions later.
+        """
+        results = {}
+        for shift in self.shifts:
+            length = n_bits - shift
+            if length <= 0:
+                continue
+            differences = ones_count(_truncate(packed, length) ^ _shifted(packed, n_bits, shift))
+            z = 2 * (differences - length / 2) / math.sqrt(length)
+            results[shift] = float(erfc(abs(z) / math.sqrt(2)))
+        return results
+
+    def report(self, key, n_bits=None):
+        """
+        Runs every test and returns the statistics, p-values and an overall pass flag.
+        """
+        packed, n_bits = as_packed(key, n_bits)
+        shannon, min_entropy = self.entropy(packed, n_bits)
+        serial_p1, serial_p2 = self.serial(packed, n_bits)
+        p_values = {
+            "monobit": self.monobit(packed, n_bits),
+            "runs": self.runs(packed, n_bits),
+            "block_frequency": self.block_frequency(packed, n_bits),
+            "serial_1": serial_p1,
+            "serial_2": serial_p2,
+        }
+        for shift, p_value in self.autocorrelation(packed, n_bits).items():
+            p_values[f"autocorrelation_{shift}"] = p_value
+
+        return {
+            "n_bits": n_bits,
+            "bias": ones_count(packed) / n_bits - 0.5,
+            "shannon_entropy": shannon,
+            "min_entropy": min_entropy,
+            "p_values": p_values,
+            "passed": all(p is None or p >= self.alpha for p in p_values.values()),
+        }
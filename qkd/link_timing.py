@@ -0,0 +1,121 @@
+import numpy as np
+from qkd.decoy_state import binary_entropy
+from utils.scheduler import Resource, Scheduler
+
+
+class LinkTiming:
+    def __init__(self, pulse_rate=1e9, detection_probability=1e-3, dead_time=50e-9,
+                 round_trip_time=1e-3, classical_bandwidth_bps=1e9, reconciliation_rounds=4,
+                 compute_seconds_per_bit=2e-8, qber=0.02, ec_efficiency=1.16):
+        """
+        Timing parameters of one QKD link. detection_probability is the chance that a pulse
+        produces a click; after each click the detector is blind for dead_time seconds.
+        Post-processing costs one round trip for sifting, one for parameter estimation and
+        reconciliation_rounds for error correction, plus compute time per sifted bit.
+        """
+        self.pulse_rate = pulse_rate
+        self.detection_probability = detection_probability
+        self.dead_time = dead_time
+        self.round_trip_time = round_trip_time
+        self.classical_bandwidth_bps = classical_bandwidth_bps
+        self.reconciliation_rounds = reconciliation_rounds
+        self.compute_seconds_per_bit = compute_seconds_per_bit
+        self.qber = qber
+        self.ec_efficiency = ec_efficiency
+
+    def click_rate(self):
+        """
+        Detected clicks per second, saturating under non-paralyzable dead time.
+        """
+        raw = self.pulse_rate * self.detection_probability
+        return raw / (1 + raw * self.dead_time)
+
+    def secret_fraction(self):
+        """
+        Asymptotic BB84 secret fraction of sifted bits at the configured QBER.
+        """
+        return float(max(0.0, 1 - binary_entropy(self.qber) * (1 + self.ec_efficiency)))
+
+
+class LinkSimulation:
+    def __init__(self, timing, num_sessions=1, block_size=10 ** 5, cpu_workers=1, seed=None):
+        """
+        Simulates num_sessions key sessions time-sharing one photon source. Each session
+        transmits a block of block_size detections, hands it to post-processing on a pool of
+        cpu_workers and immediately starts its next block, so stages overlap as they would
+        on real hardware.
+        """
+        self.timing = timing
+        self.num_sessions = num_sessions
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+        self.scheduler = Scheduler()
+        self.source = Resource(self.scheduler, capacity=1)
+        self.cpu = Resource(self.scheduler, capacity=cpu_workers)
+        self.key_bits = [0] * num_sessions
+        self.latencies = []
+
+    def transmission_time(self):
+        """
+        Time to collect block_size clicks: gamma-distributed inter-click gaps at the raw
+        click rate plus one dead time per click.
+        """
+        timing = self.timing
+        raw_rate = timing.pulse_rate * timing.detection_probability
+        return self.rng.gamma(self.block_size, 1 / raw_rate) + self.block_size * timing.dead_time
+
+    def session(self, index):
+        while True:
+            yield self.source.acquire()
+            started = self.scheduler.now
+            yield self.transmission_time()
+            self.source.release()
+            self.scheduler.process(self.post_processing(index, started))
+
+    def post_processing(self, index, started):
+        timing = self.timing
+        sifted = self.rng.binomial(self.block_size, 0.5)
+        # Sifting: basis announcement, sent bit-packed, plus the reply
+        yield timing.round_trip_time + self.block_size / timing.classical_bandwidth_bps
+        # Parameter estimation
+        yield timing.round_trip_time
+        yield self.cpu.acquire()
+        # Error correction and privacy amplification
+        yield timing.reconciliation_rounds * timing.round_trip_time + sifted * timing.compute_seconds_per_bit
+        self.cpu.release()
+        self.key_bits[index] += int(sifted * timing.secret_fraction())
+        self.latencies.append(self.scheduler.now - started)
+
+    def run(self, duration):
+        """
+        Runs the link for the given simulated time and reports key throughput and
+        photon-to-key latency.
+        """
+        for index in range(self.num_sessions):
+            self.scheduler.process(self.session(index))
+        self.scheduler.run(until=duration)
+
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        total_bits = sum(self.key_bits)
+        return {
+            "duration": duration,
+            "sessions": self.num_sessions,
+            "click_rate": self.timing.click_rate(),
+            "key_bits": total_bits,
+            "key_rate_bps": total_bits / duration,
+            "per_session_key_rate_bps": [bits / duration for bits in self.key_bits],
+            "blocks": len(self.latencies),
+            "latency_mean": float(latencies.mean()),
+            "latency_p50": float(np.percentile(latencies, 50)),
+            "latency_p99": float(np.percentile(latencies, 99)),
+            "latency_max": float(latencies.max()),
+            "source_utilization": self.source.utilization(),
+            "cpu_utilization": self.cpu.utilization(),
+        }
+
+    def sustains(self, duration, target_key_rate_bps):
+        """
+        Whether every session reaches the target key rate over the given simulated time.
+        """
+        report = self.run(duration)
+        return all(rate >= target_key_rate_bps for rate in report["per_session_key_rate_bps"]), report
@@ -0,0 +1,76 @@
+from hashlib import shake_256
+import numpy as np
+from scipy import fft
+
+
+def toeplitz_hash_batch(keys, seeds, output_lengths, workers=-1):
+    """
+    Multiplies every key by its own binary Toeplitz matrix in one FFT pass.
+    For a key of n bits and m output bits each seed holds m + n - 1 bits and the matrix is
+    scipy.linalg.toeplitz(seed[:m], seed[m - 1:]): first column seed[:m], first row
+    seed[m - 1:] with its first element replaced by seed[0]. Reordering the seed as
+    seed[m:][::-1] + seed[:m] turns the product into a slice of the convolution of the
+    reordered seed with the key. Keys and seeds of different lengths are zero-padded into
+    one 2-D batch, which leaves those slices unchanged. The FFTs run on `workers` threads.
+    """
+    key_lengths = np.array([len(key) for key in keys], dtype=np.int64)
+    seed_lengths = np.array([len(seed) for seed in seeds], dtype=np.int64)
+    size = fft.next_fast_len(int(key_lengths.max(initial=1) + seed_lengths.max(initial=1) - 1), real=True)
+
+    key_batch = np.zeros((len(keys), int(key_lengths.max(initial=0))), dtype=np.float64)
+    seed_batch = np.zeros((len(seeds), int(seed_lengths.max(initial=0))), dtype=np.float64)
+    for row, (key, seed, output_length) in enumerate(zip(keys, seeds, output_lengths)):
+        seed = np.asarray(seed)
+        key_batch[row, :len(key)] = key
+        seed_batch[row, :len(seed)] = np.concatenate([seed[output_length:][::-1], seed[:output_length]])
+    spectrum = fft.rfft(key_batch, size, axis=1, workers=workers)
+    spectrum *= fft.rfft(seed_batch, size, axis=1, workers=workers)
+    products = fft.irfft(spectrum, size, axis=1, workers=workers)
+
+    outputs = []
+    for row, (key_length, output_length) in enumerate(zip(key_lengths, output_lengths)):
+        start = int(key_length) - 1
+        outputs.append(np.rint(products[row, start:start + output_length]).astype(np.int64) % 2)
+    return outputs
+
+
+def shake_kdf(key, num_bytes, context=b""):
+    """
+    Derives num_bytes of output from a key with SHAKE256, separated by an optional context.
+    """
+    return shake_256(bytes(key) + bytes(context)).digest(num_bytes)
+
+
+class PrivacyAmplifier:
+    def __init__(self, compression=1 / 3, workers=-1, kdf_bytes=None, kdf_context=b"qkd-pa"):
+        """
+        Batched privacy amplification for many reconciled frames at once. Each frame of n
+        bits is compressed to int(n * compression) bits unless explicit output lengths are
+        given, so the extracted key is not capped at a digest size. With kdf_bytes set, each
+        key is additionally expanded or shortened through a SHAKE256 KDF.
+        """
+        self.compression = compression
+        self.workers = workers
+        self.kdf_bytes = kdf_bytes
+        self.kdf_context = kdf_context
+
+    def output_lengths(self, keys):
+        return [int(len(key) * self.compression) for key in keys]
+
+    def amplify(self, keys, output_lengths=None, seeds=None):
+        """
+        Hashes a batch of reconciled bit lists. Returns (keys, seeds): the secure keys as
+        packed bytes (the last byte zero-padded) and the Toeplitz seed bits used per frame,
+        which must be sent to the peer.
+        """
+        if output_lengths is None:
+            output_lengths = self.output_lengths(keys)
+        if seeds is None:
+            seeds = [np.random.randint(0, 2, max(0, m + len(key) - 1)) for key, m in zip(keys, output_lengths)]
+        if not keys:
+            return [], seeds
+        hashed = toeplitz_hash_batch(keys, seeds, output_lengths, self.workers)
+        secure_keys = [np.packbits(bits).tobytes() for bits in hashed]
+        if self.kdf_bytes is not None:
+            secure_keys = [shake_kdf(key, self.kdf_bytes, self.kdf_context) for key in secure_keys]
+        return secure_keys, seeds
@@ -1,23 +1,42 @@
 import numpy as np
 import random
 import logging
-from scipy.linalg import hadamard, toeplitz
+from contextlib import ExitStack, nullcontext
+from scipy.linalg import hadamard
 from hashlib import sha3_256
+from comms.wire import WireCodec
+from qkd.privacy_amplification import PrivacyAmplifier, toeplitz_hash_batch
 
 class QKDProtocol:
-    def __init__(self, num_qubits=2048, error_threshold=0.02):
+    def __init__(self, num_qubits=2048, error_threshold=0.02, metrics=None, quality_check=None, channel=None,
+                 noise=0.0, amplifier=None, sequential_test=None, sequential_chunk=256, memory_profiler=None):
         self.num_qubits = num_qubits
         self.error_threshold = error_threshold
+        self.noise = noise  # Probability that the quantum channel flips Bob's measurement
+        self.last_error_rate = None
+        self.last_sifted_bits = 0
+        self.sequential_test = sequential_test  # Optional SequentialErrorTest for early abort, see SequentialErrorTest.budgeted
+        self.sequential_chunk = sequential_chunk  # Qubits generated per sequential test step
+        self.last_abort_fraction = None
+        self.metrics = metrics
+        self.memory_profiler = memory_profiler  # Optional utils.memory.MemoryProfiler for per-stage allocations
+        self.channel = channel  # Optional comms.Channel that carries encoded post-processing messages
+        self.codec = WireCodec()
+        self.amplifier = amplifier or PrivacyAmplifier()  # Batched stage used by run_batch
+        self.quality_check = quality_check  # Optional KeyQuality run on every secure key
+        self.last_quality_report = None
         self.hadamard_matrix = hadamard(2)  # Hadamard gate for basis transformation
     
-    def generate_quantum_states(self):
+    def generate_quantum_states(self, num_qubits=None):
         """
-        Generate quantum states using Hadamard transformations and simulate entanglement.
+        Prepare single-qubit BB84 states in randomly chosen Z or X bases.
+        Entanglement-based protocols are simulated in qkd.entanglement.
         """
-        alice_bases = np.random.choice(['Z', 'X'], self.num_qubits)
-        alice_bits = np.random.choice([0, 1], self.num_qubits)
+        num_qubits = self.num_qubits if num_qubits is None else num_qubits
+        alice_bases = np.random.choice(['Z', 'X'], num_qubits)
+        alice_bits = np.random.choice([0, 1], num_qubits)
         
-        # Create Bell pairs for entanglement
+        # Prepare one state vector per qubit
         entangled_states = []
         for base, bit in zip(alice_bases, alice_bits):
             if base == 'Z':
@@ -31,29 +50,50 @@ class QKDProtocol:
         """
         Simulate Bob's quantum measurement with additional entanglement effects.
         """
-        bob_bases = np.random.choice(['Z', 'X'], self.num_qubits)
+        bob_bases = np.random.choice(['Z', 'X'], len(alice_bases))
         bob_results = []
         for state, alice_base, bob_base in zip(entangled_states, alice_bases, bob_bases):
             if alice_base == bob_base:
                 bit = 0 if np.allclose(state, np.array([1, 0])) or np.allclose(state, (1/np.sqrt(2)) * np.array([1, 1])) else 1
             else:
                 bit = random.choice([0, 1])  # Random outcome if measured in the wrong basis
+            if self.noise and random.random() < self.noise:
+                bit ^= 1
             bob_results.append(bit)
         return bob_bases, bob_results
 
-    def reconcile_and_correct(self, alice_bits, bob_results, alice_bases, bob_bases):
+    def reconcile_and_correct(self, alice_bits, bob_results, alice_bases, bob_bases, sample_indices=None):
         """
         Perform error detection and correction using LDPC codes.
+        sample_indices (positions among the sifted bits) may be given when the error
+        sample was already drawn while streaming.
         """
-        matching_indices = [i for i in range(self.num_qubits) if alice_bases[i] == bob_bases[i]]
-        shared_key = [alice_bits[i] for i in matching_indices if alice_bits[i] == bob_results[i]]
+        matching_indices = [i for i in range(len(alice_bases)) if alice_bases[i] == bob_bases[i]]
+        if not matching_indices:
+            raise SecurityException("No qubits were measured in matching bases.")
         
-        # Error estimation using entropy calculations
-        sample_size = max(1, int(0.15 * len(shared_key)))  # Sample 15% of bits
-        sample_indices = random.sample(range(len(shared_key)), sample_size)
-        error_count = sum(1 for i in sample_indices if shared_key[i] != bob_results[matching_indices[i]])
+        # Error estimation on a 15% sample of the sifted bits, which are then discarded
+        if not sample_indices:
+            sample_size = max(1, int(0.15 * len(matching_indices)))
+            sample_indices = sorted(random.sample(range(len(matching_indices)), sample_size))
+        sample_size = len(sample_indices)
+        error_count = sum(1 for i in sample_indices
+                          if alice_bits[matching_indices[i]] != bob_results[matching_indices[i]])
         error_rate = error_count / sample_size
+        self.last_error_rate = error_rate
+        self.last_sifted_bits = len(matching_indices)
+
+        # Reconciliation is assumed to leave Bob with Alice's remaining sifted bits
+        disclosed = set(sample_indices)
+        shared_key = [alice_bits[index] for i, index in enumerate(matching_indices) if i not in disclosed]
         
+        if self.channel is not None:
+            self.channel.simulate_classical_channel(self.codec.encode_bases(bob_bases), "bases")
+            self.channel.simulate_classical_channel(self.codec.encode_indices(matching_indices), "sifted_indices")
+            self.channel.simulate_classical_channel(self.codec.encode_indices(sample_indices), "sample_indices")
+            self.channel.simulate_classical_channel(
+                self.codec.encode_sample_bits([bob_results[matching_indices[i]] for i in sample_indices]), "sample_bits")
+
         if error_rate > self.error_threshold:
             raise SecurityException("Excessive quantum bit errors detected! Possible eavesdropping.")
         
@@ -62,12 +102,17 @@ class QKDProtocol:
     def privacy_amplification(self, shared_key):
         """
         Apply universal hash functions and SHA3-256 for secure compression.
+        The digest caps the key at 256 bits; run_batch keeps the full extracted length.
         """
         key_length = len(shared_key)
         hash_size = min(512, key_length // 3)  # Reduce key length securely
         
-        toeplitz_matrix = np.random.randint(0, 2, (hash_size, key_length))
-        compressed_key = np.dot(toeplitz_matrix, shared_key) % 2
+        # The Toeplitz matrix is fully described by hash_size + key_length - 1 seed bits
+        seed = np.random.randint(0, 2, max(0, hash_size + key_length - 1))
+        compressed_key = toeplitz_hash_batch([shared_key], [seed], [hash_size])[0]
+        if self.channel is not None:
+            self.channel.simulate_classical_channel(
+                self.codec.encode_hash_seed(np.packbits(seed), hash_size), "hash_seed")
         
         # Further compress using cryptographic hash function
         key_bytes = ''.join(map(str, compressed_key)).encode()
@@ -78,12 +123,153 @@ class QKDProtocol:
         """
         Execute the full QKD protocol with entanglement-based quantum state preparation, measurement, and key generation.
         """
-        alice_bases, alice_bits, entangled_states = self.generate_quantum_states()
-        bob_bases, bob_results = self.measure_quantum_states(entangled_states, alice_bases)
-        shared_key = self.reconcile_and_correct(alice_bits, bob_results, alice_bases, bob_bases)
-        secure_key = self.privacy_amplification(shared_key)
+        bytes_before = self.channel.bytes_sent if self.channel is not None else 0
+        try:
+            shared_key = self._sift_frame()
+        except SecurityException:
+            if self.metrics is not None:
+                self.metrics.increment("qkd.aborted")
+            raise
+        with self._stage("privacy_amplification"):
+            secure_key = self.privacy_amplification(shared_key)
+        if self.quality_check is not None:
+            with self._stage("key_quality"):
+                self._check_key_quality(secure_key)
+        if self.metrics is not None:
+            self.metrics.increment("qkd.runs")
+            self.metrics.increment("qkd.qubits", self.num_qubits)
+            if self.channel is not None:
+                classical_bytes = self.channel.bytes_sent - bytes_before
+                self.metrics.increment("classical.bytes", classical_bytes)
+                self.metrics.set_gauge("classical.bytes_per_secret_bit", classical_bytes / (len(secure_key) * 4))
         return secure_key
 
+    def _sift_frame(self):
+        """
+        Prepares, measures and reconciles one block, streaming it through the sequential
+        test when one is configured. Returns the shared key or raises SecurityException.
+        """
+        if self.sequential_test is not None:
+            alice_bases, alice_bits, bob_bases, bob_results, sample_indices = self._stream_quantum_states()
+        else:
+            with self._stage("generate_quantum_states"):
+                alice_bases, alice_bits, entangled_states = self.generate_quantum_states()
+            with self._stage("measure_quantum_states"):
+                bob_bases, bob_results = self.measure_quantum_states(entangled_states, alice_bases)
+            sample_indices = None
+        with self._stage("reconcile_and_correct"):
+            return self.reconcile_and_correct(alice_bits, bob_results, alice_bases, bob_bases, sample_indices)
+
+    def _stream_quantum_states(self):
+        """
+        Generates and measures the block in chunks of sequential_chunk qubits. After each
+        chunk, 15% of its sifted bits are disclosed to the sequential test through
+        ErrorHandling.detect_eavesdropping_sequential, and the block is abandoned as soon as
+        the test rejects. Once the test accepts, the rest of the block is generated without
+        further testing. Returns the concatenated transcripts and the sample positions among
+        the sifted bits; the final threshold check in reconcile_and_correct still applies.
+        """
+        from qkd.error_handling import ErrorHandling  # error_handling imports this module
+
+        test = self.sequential_test
+        test.reset()
+        alice_bases, alice_bits, bob_bases, bob_results, sample_indices = [], [], [], [], []
+        generated = [0]
+
+        def mismatch_chunks():
+            sifted = 0
+            for start in range(0, self.num_qubits, self.sequential_chunk):
+                size = min(self.sequential_chunk, self.num_qubits - start)
+                with self._stage("generate_quantum_states"):
+                    chunk_bases, chunk_bits, states = self.generate_quantum_states(size)
+                with self._stage("measure_quantum_states"):
+                    chunk_bob_bases, chunk_results = self.measure_quantum_states(states, chunk_bases)
+                matching = np.flatnonzero(chunk_bases == chunk_bob_bases)
+                picked = np.sort(np.random.choice(matching.size, int(round(0.15 * matching.size)), replace=False))
+                sample_indices.extend((sifted + picked).tolist())
+                sifted += matching.size
+                for collected, chunk in zip((alice_bases, alice_bits, bob_bases, bob_results),
+                                            (chunk_bases, chunk_bits, chunk_bob_bases, chunk_results)):
+                    collected.extend(chunk)
+                generated[0] = start + size
+                yield chunk_bits[matching[picked]] != np.asarray(chunk_results)[matching[picked]]
+
+        chunks = mismatch_chunks()
+        try:
+            ErrorHandling().detect_eavesdropping_sequential(chunks, test)
+        except SecurityException as e:
+            self.last_abort_fraction = generated[0] / self.num_qubits
+            self.last_error_rate = test.error_rate()
+            if self.metrics is not None:
+                self.metrics.increment("qkd.early_aborts")
+                self.metrics.set_gauge("qkd.abort_fraction", self.last_abort_fraction)
+            raise SecurityException(
+                f"Sequential test detected eavesdropping after {generated[0]} of {self.num_qubits} qubits.") from e
+        for _ in chunks:  # The test accepted early; finish the block
+            pass
+        self.last_abort_fraction = None
+        return alice_bases, alice_bits, bob_bases, bob_results, sample_indices
+
+    def run_batch(self, num_frames):
+        """
+        Runs num_frames blocks through sifting and reconciliation, with the same sequential
+        and threshold checks as run_protocol, then privacy-amplifies all surviving frames in
+        one batched pass. Returns the raw secure keys as bytes, one per frame that was not
+        aborted; their length follows the amplifier's compression rather than a fixed digest
+        size. Each key goes through the configured quality check.
+        """
+        shared_keys = []
+        for _ in range(num_frames):
+            try:
+                shared_keys.append(self._sift_frame())
+            except SecurityException:
+                if self.metrics is not None:
+                    self.metrics.increment("qkd.aborted")
+        with self._stage("privacy_amplification_batch"):
+            secure_keys, seeds = self.amplifier.amplify(shared_keys)
+        if self.channel is not None:
+            for key, seed in zip(shared_keys, seeds):
+                output_bits = len(seed) - len(key) + 1
+                self.channel.simulate_classical_channel(
+                    self.codec.encode_hash_seed(np.packbits(seed), output_bits), "hash_seed")
+        if self.quality_check is not None:
+            with self._stage("key_quality"):
+                for key in secure_keys:
+                    self._check_key_quality(key)
+        if self.metrics is not None:
+            self.metrics.increment("qkd.runs", len(secure_keys))
+            self.metrics.increment("qkd.qubits", num_frames * self.num_qubits)
+            self.metrics.increment("qkd.secret_bytes", sum(len(key) for key in secure_keys))
+        return secure_keys
+
+    def _check_key_quality(self, secure_key):
+        """
+        Runs the configured randomness checks on a secure key and records the outcome.
+        Failures are logged rather than raised, since they occur at rate alpha on good keys.
+        """
+        report = self.quality_check.report(secure_key)
+        self.last_quality_report = report
+        if self.metrics is not None:
+            self.metrics.set_gauge("qkd.key_min_entropy", report["min_entropy"])
+            self.metrics.set_gauge("qkd.key_bias", report["bias"])
+        if not report["passed"]:
+            logging.warning(f"Secure key failed randomness checks: {report['p_values']}")
+            if self.metrics is not None:
+                self.metrics.increment("qkd.quality_failures")
+
+    def _stage(self, name):
+        """
+        Times a protocol stage when a metrics collector is attached, and tracks its
+        allocations when a memory profiler is attached.
+        """
+        if self.memory_profiler is None:
+            return nullcontext() if self.metrics is None else self.metrics.timer(f"qkd.{name}")
+        stack = ExitStack()
+        stack.enter_context(self.memory_profiler.stage(f"qkd.{name}", self.num_qubits))
+        if self.metrics is not None:
+            stack.enter_context(self.metrics.timer(f"qkd.{name}"))
+        return stack
+
 class SecurityException(Exception):
     """
     Custom exception for security-related issues.
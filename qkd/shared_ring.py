@@ -0,0 +1,186 @@
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+from qkd.key_management import KeyExhaustedError
+from qkd.qkd_protocol import QKDProtocol
+
+# Head and tail live on separate cache lines so producer and consumer never write the same line
+HEAD_OFFSET = 0
+TAIL_OFFSET = 64
+CAPACITY_OFFSET = 128
+HEADER_SIZE = 192
+
+
+class SharedKeyRing:
+    def __init__(self, capacity=1 << 20, name=None):
+        """
+        Ring buffer of raw key bytes in shared memory, for handing key material from a
+        generator process to a consumer process without pickling. Pass name to attach to a
+        ring created elsewhere; the capacity is then read from the ring itself.
+
+        The ring is single-producer, single-consumer and lock-free: head and tail are
+        monotonically increasing byte counts, each written by one side only. A side copies
+        its data before publishing the new index with a single aligned 8-byte store, which
+        the other side never sees torn. Use one ring per producer for several generators.
+        """
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity)
+            self.shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            self._index(CAPACITY_OFFSET)[...] = capacity
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.head = self._index(HEAD_OFFSET)
+        self.tail = self._index(TAIL_OFFSET)
+        self.capacity = int(self._index(CAPACITY_OFFSET))
+        self.data = self.shm.buf[HEADER_SIZE:HEADER_SIZE + self.capacity]
+
+    def _index(self, offset):
+        return np.ndarray((), dtype=np.uint64, buffer=self.shm.buf, offset=offset)
+
+    @property
+    def produced(self):
+        return int(self.head)
+
+    @property
+    def consumed(self):
+        return int(self.tail)
+
+    def available(self):
+        return int(self.head) - int(self.tail)
+
+    def free(self):
+        return self.capacity - self.available()
+
+    def reserve(self, max_bytes):
+        """
+        Producer side: returns a writable view of the next contiguous free region, at most
+        max_bytes long and possibly shorter at the wrap point. Write into it, then commit().
+        """
+        head = int(self.head)
+        start = head % self.capacity
+        length = min(max_bytes, self.capacity - self.available(), self.capacity - start)
+        return self.data[start:start + length]
+
+    def commit(self, num_bytes):
+        """
+        Producer side: publishes num_bytes written into the last reserved region.
+        """
+        self.head[...] = int(self.head) + num_bytes
+
+    def add(self, material):
+        """
+        Appends as much key material as fits and returns the number of bytes accepted,
+        matching KeyPool.add.
+        """
+        material = memoryview(material).cast("B")
+        accepted = 0
+        while accepted < material.nbytes:
+            region = self.reserve(material.nbytes - accepted)
+            if region.nbytes == 0:
+                break
+            region[:] = material[accepted:accepted + region.nbytes]
+            self.commit(region.nbytes)
+            accepted += region.nbytes
+        return accepted
+
+    def put(self, material, timeout=None, poll_interval=1e-4):
+        """
+        Appends all of the material, waiting for the consumer to free space.
+        Raises TimeoutError if the ring stays full past the timeout.
+        """
+        material = memoryview(material).cast("B")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        written = 0
+        while written < material.nbytes:
+            written += self.add(material[written:])
+            if written < material.nbytes:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Shared key ring full after writing {written} bytes.")
+                time.sleep(poll_interval)
+
+    def peek(self, num_bytes):
+        """
+        Consumer side: returns a read-only view of up to num_bytes of unread key, stopping at
+        the wrap point. The region stays owned by the consumer until consume() is called.
+        """
+        tail = int(self.tail)
+        start = tail % self.capacity
+        length = min(num_bytes, int(self.head) - tail, self.capacity - start)
+        return self.data[start:start + length].toreadonly()
+
+    def consume(self, num_bytes):
+        """
+        Consumer side: releases num_bytes of peeked key so the producer can overwrite them.
+        """
+        self.tail[...] = int(self.tail) + num_bytes
+
+    @contextmanager
+    def segment(self, num_bytes):
+        """
+        Yields the next num_bytes of key as one contiguous view, consumed on exit. The view
+        points into shared memory unless the segment straddles the wrap point, where the two
+        halves are joined into a copy.
+        """
+        if num_bytes > self.available():
+            raise KeyExhaustedError(f"Requested {num_bytes} bytes but only {self.available()} are available.")
+        view = self.peek(num_bytes)
+        if view.nbytes < num_bytes:
+            view = bytes(view) + bytes(self.data[:num_bytes - view.nbytes])
+        try:
+            yield view
+        finally:
+            if isinstance(view, memoryview):
+                view.release()
+            self.consume(num_bytes)
+
+    def take(self, num_bytes):
+        """
+        Removes and returns the next num_bytes of key material as bytes, matching KeyPool.take.
+        """
+        with self.segment(num_bytes) as view:
+            return bytes(view)
+
+    def skip(self, num_bytes):
+        if num_bytes > self.available():
+            raise KeyExhaustedError(f"Cannot skip {num_bytes} bytes; only {self.available()} are available.")
+        self.consume(num_bytes)
+
+    def close(self):
+        """
+        Detaches this process from the ring. Views returned earlier must be released first.
+        """
+        self.data.release()
+        del self.head, self.tail
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Frees the shared memory; call once, from the creating process, after all sides close.
+        """
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def produce_keys(ring_name, num_keys, protocol_kwargs=None, batch_size=16):
+    """
+    Worker entry point: runs the BB84 protocol for num_keys frames, batch_size at a time
+    through QKDProtocol.run_batch, and writes each frame's packed secure-key bits (the
+    Toeplitz output, not a digest of it) into the named ring, blocking while the consumer
+    catches up. Aborted frames are skipped; consumers that want a digest hash on their side.
+    Returns the number of keys written.
+    """
+    protocol = QKDProtocol(**(protocol_kwargs or {}))
+    written = 0
+    with SharedKeyRing(name=ring_name) as ring:
+        for start in range(0, num_keys, batch_size):
+            for key in protocol.run_batch(min(batch_size, num_keys - start)):
+                ring.put(key)
+                written += 1
+    return written
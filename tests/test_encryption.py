@@ -0,0 +1,32 @@
+import os
+import signal
+import pytest
+from crypto.encryption import MODE_PARALLEL_GCM, PARALLEL_HEADER, Encryption
+
+
+@pytest.fixture
+def encryption():
+    with Encryption(os.urandom(32), segment_size=64) as encryption:
+        yield encryption
+
+
+def test_parallel_round_trip(encryption):
+    data = os.urandom(1000)
+    assert encryption.decrypt_parallel(encryption.encrypt_parallel(data)) == data
+
+
+def test_truncated_message_is_rejected(encryption):
+    message = encryption.encrypt_parallel(os.urandom(1000))
+    with pytest.raises(ValueError):
+        encryption.decrypt_parallel(message[:-1])
+
+
+def test_forged_header_length_is_rejected_without_allocating():
+    forged = PARALLEL_HEADER.pack(os.urandom(8), MODE_PARALLEL_GCM, 2 ** 40, 16) + b"\0" * 8
+    signal.signal(signal.SIGALRM, signal.default_int_handler)
+    signal.alarm(5)
+    try:
+        with pytest.raises(ValueError):
+            Encryption(os.urandom(32)).decrypt_parallel(forged)
+    finally:
+        signal.alarm(0)
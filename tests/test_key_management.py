@@ -0,0 +1,16 @@
+import os
+import stat
+from qkd.key_management import KeyManagement
+
+
+def test_saved_store_is_private(tmp_path):
+    path = tmp_path / "qkd_keys.json"
+    (tmp_path / "qkd_keys.json.tmp").write_text("stale")
+    os.chmod(tmp_path / "qkd_keys.json.tmp", 0o644)
+    keys = KeyManagement()
+    keys.store_key("ab" * 32, "bob")
+    keys.save(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    loaded = KeyManagement()
+    loaded.load(str(path))
+    assert loaded.retrieve_key("bob") == "ab" * 32
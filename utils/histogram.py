@@ -0,0 +1,95 @@
+import math
+import threading
+import numpy as np
+
+
+class LatencyHistogram:
+    def __init__(self, lowest=1e-6, highest=3600.0, significant_digits=2):
+        """
+        HDR-style histogram of latencies in seconds. Bucket boundaries grow geometrically
+        by a factor of 1 + 10^-significant_digits, so every recorded value is reproduced to
+        that relative precision across the whole range with a fixed, small array of counts.
+        Values outside [lowest, highest] are clamped into the first or last bucket; the
+        exact minimum and maximum are tracked separately.
+        """
+        self.lowest = lowest
+        self.highest = highest
+        self.log_ratio = math.log1p(10.0 ** -significant_digits)
+        self.counts = np.zeros(self._index(highest) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, value):
+        return int(math.log(value / self.lowest) / self.log_ratio) if value > self.lowest else 0
+
+    def _indices(self, values):
+        with np.errstate(divide="ignore"):
+            indices = np.floor(np.log(np.maximum(values, self.lowest) / self.lowest) / self.log_ratio)
+        return np.clip(indices.astype(np.int64), 0, self.counts.size - 1)
+
+    def record(self, value):
+        value = float(value)
+        index = min(self._index(value), self.counts.size - 1)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+    def record_many(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        indices = self._indices(values)
+        with self._lock:
+            np.add.at(self.counts, indices, 1)
+            self.count += values.size
+            self.total += float(values.sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """
+        Adds another histogram with the same bucket layout into this one.
+        """
+        if other.counts.size != self.counts.size or other.lowest != self.lowest:
+            raise ValueError("Histograms have different bucket layouts.")
+        with self._lock:
+            self.counts += other.counts
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def value_at(self, index):
+        """
+        Midpoint (geometric) of a bucket, the value reported for anything recorded in it.
+        """
+        return self.lowest * math.exp((index + 0.5) * self.log_ratio)
+
+    def percentile(self, q):
+        """
+        Latency at percentile q (0-100), accurate to the histogram's precision and never
+        above the recorded maximum.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(max(self.value_at(index), self.min), self.max)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Returns count, mean, min, max and the requested percentiles as a plain dict.
+        """
+        summary = {"count": self.count, "mean": self.mean(), "min": self.min if self.count else 0.0, "max": self.max}
+        for q in percentiles:
+            summary[f"p{q:g}".replace(".", "")] = self.percentile(q)
+        return summary
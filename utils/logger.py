@@ -1,11 +1,11 @@
 import logging
 
-def setup_logger():
+def setup_logger(level=logging.INFO):
     """
     Configures the logger for the application.
     """
     logging.basicConfig(
-        level=logging.INFO,
+        level=level,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[logging.StreamHandler()]
     )
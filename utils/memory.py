@@ -0,0 +1,85 @@
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+
+NUMPY_DOMAIN = np.lib.tracemalloc_domain  # NumPy reports its data buffers under this domain
+
+
+class MemoryProfiler:
+    def __init__(self, metrics=None, track_numpy=True, frames=1):
+        """
+        Opt-in allocation tracking with tracemalloc. Each stage reports the peak bytes
+        allocated above its starting point and the bytes still held when it ends; with
+        track_numpy the retained bytes held by NumPy array buffers are reported separately.
+        Stages may nest: an outer stage's peak includes its inner stages.
+        Results are exported as memory.* gauges when a Metrics collector is attached.
+        """
+        self.metrics = metrics
+        self.track_numpy = track_numpy
+        self.frames = frames
+        self.stages = {}
+        self._stack = []
+        self._started = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+
+    def stop(self):
+        """
+        Stops tracemalloc if this profiler started it.
+        """
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def _numpy_bytes(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.DomainFilter(True, NUMPY_DOMAIN)])
+        return sum(trace.size for trace in snapshot.traces)
+
+    @contextmanager
+    def stage(self, name, num_items=None):
+        """
+        Measures the enclosed block. num_items (e.g. qubits) adds a per-item peak figure.
+        """
+        self.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+        numpy_before = self._numpy_bytes() if self.track_numpy else 0
+        frame = {"start": current, "peak": 0}
+        self._stack.append(frame)
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["peak"])
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            result = {"peak_bytes": peak - frame["start"], "retained_bytes": current - frame["start"]}
+            if self.track_numpy:
+                result["numpy_retained_bytes"] = self._numpy_bytes() - numpy_before
+            if num_items:
+                result["peak_bytes_per_item"] = result["peak_bytes"] / num_items
+            self._record(name, result)
+
+    def _record(self, name, result):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = dict(result, runs=0, max_peak_bytes=result["peak_bytes"])
+        stats.update(result)
+        stats["runs"] += 1
+        stats["max_peak_bytes"] = max(stats["max_peak_bytes"], result["peak_bytes"])
+        if self.metrics is not None:
+            for key, value in result.items():
+                self.metrics.set_gauge(f"memory.{name}.{key}", value)
+            self.metrics.set_gauge(f"memory.{name}.max_peak_bytes", stats["max_peak_bytes"])
+
+    def report(self):
+        """
+        Returns the latest measurements per stage, plus the largest peak seen for each.
+        """
+        return {name: dict(stats) for name, stats in self.stages.items()}
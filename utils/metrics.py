@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, amount=1):
+        """
+        Adds an amount to a named counter.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        """
+        Records the latest value of a named gauge.
+        """
+        with self._lock:
+            self.gauges[name] = value
+
+    def record_time(self, name, seconds):
+        """
+        Folds a single duration into the running statistics for a stage.
+        """
+        with self._lock:
+            stats = self.timings.get(name)
+            if stats is None:
+                stats = {"count": 0, "total": 0.0, "min": seconds, "max": seconds}
+                self.timings[name] = stats
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["min"] = min(stats["min"], seconds)
+            stats["max"] = max(stats["max"], seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Times the enclosed block and records it under the given name.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start_time)
+
+    def snapshot(self):
+        """
+        Returns a plain-dict copy of all metrics, with mean stage times.
+        """
+        with self._lock:
+            timings = {}
+            for name, stats in self.timings.items():
+                timings[name] = dict(stats, mean=stats["total"] / stats["count"])
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timings": timings,
+            }
+
+    def to_json(self, indent=2):
+        """
+        Serializes the current snapshot as JSON.
+        """
+        return json.dumps(self.snapshot(), indent=indent, sort_keys=True)
+
+    def reset(self):
+        """
+        Clears all recorded metrics.
+        """
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.gauges.clear()
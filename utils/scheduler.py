@@ -0,0 +1,91 @@
+import heapq
+import itertools
+from collections import deque
+
+
+class Resource:
+    def __init__(self, scheduler, capacity=1):
+        """
+        A shared resource with a fixed number of slots. Processes yield acquire() and are
+        resumed, in FIFO order, once a slot is free; they must call release() when done.
+        """
+        self.scheduler = scheduler
+        self.capacity = capacity
+        self.in_use = 0
+        self.waiting = deque()
+        self.busy_time = 0.0
+        self._last_change = 0.0
+
+    def acquire(self):
+        return self
+
+    def _account(self):
+        now = self.scheduler.now
+        self.busy_time += self.in_use * (now - self._last_change)
+        self._last_change = now
+
+    def _request(self, process):
+        if self.in_use < self.capacity:
+            self._account()
+            self.in_use += 1
+            self.scheduler.schedule(0.0, self.scheduler._resume, process)
+        else:
+            self.waiting.append(process)
+
+    def release(self):
+        self._account()
+        if self.waiting:
+            self.scheduler.schedule(0.0, self.scheduler._resume, self.waiting.popleft())
+        else:
+            self.in_use -= 1
+
+    def utilization(self):
+        """
+        Mean fraction of the slots in use since the start of the simulation.
+        """
+        self._account()
+        if self.scheduler.now == 0:
+            return 0.0
+        return self.busy_time / (self.capacity * self.scheduler.now)
+
+
+class Scheduler:
+    def __init__(self):
+        """
+        Discrete-event scheduler backed by a binary heap. Events are callbacks ordered by
+        time, with ties broken by insertion order. Processes are generators that yield a
+        delay in seconds or a Resource to wait for.
+        """
+        self.now = 0.0
+        self.queue = []
+        self.sequence = itertools.count()
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self.queue, (self.now + delay, next(self.sequence), callback, args))
+
+    def process(self, generator, delay=0.0):
+        """
+        Starts a generator-based process after the given delay.
+        """
+        self.schedule(delay, self._resume, generator)
+
+    def _resume(self, generator):
+        try:
+            step = next(generator)
+        except StopIteration:
+            return
+        if isinstance(step, Resource):
+            step._request(generator)
+        else:
+            self.schedule(step, self._resume, generator)
+
+    def run(self, until=None):
+        """
+        Executes events in time order, stopping before the first event after `until`.
+        """
+        while self.queue and (until is None or self.queue[0][0] <= until):
+            self.now, _, callback, args = heapq.heappop(self.queue)
+            callback(*args)
+        if until is not None:
+            self.now = max(self.now, until)
+        return self.now